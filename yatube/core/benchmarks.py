@@ -0,0 +1,286 @@
+import gc
+import statistics
+import time
+from contextlib import contextmanager
+from functools import partial
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts import counters
+from posts.models import Counter, Follow, Group, Post
+
+User = get_user_model()
+
+SIZES = (100, 1000, 5000)
+REPEAT = 20
+THRESHOLD = 0.25
+# Разница во времени меньше этой не считается замедлением: это шум
+# таймера и планировщика, а не код.
+LATENCY_FLOOR_MS = 5
+# p95 из пары десятков замеров почти равен максимуму и слишком шумный
+# для сравнения, поэтому с эталоном сверяется только медиана.
+GATED_LATENCY = 'p50_ms'
+# Дата последнего поста фиксирована, чтобы данные не зависели от дня
+# запуска.
+SEED_END = '2024-01-01'
+MODES = ('cold', 'warm')
+
+
+class BenchmarkError(Exception):
+    """Маршрут ответил ошибкой: замер не имеет смысла."""
+
+
+def seed(posts, seed=1):
+    """Очищает базу и заполняет её данными на ``posts`` постов."""
+    call_command('flush', interactive=False, verbosity=0)
+    cache.clear()
+    call_command(
+        'seed_scale', stdout=StringIO(), seed=seed, end=SEED_END,
+        users=max(10, posts // 10), groups=20, posts=posts,
+        comments=posts * 2, follows=posts // 2,
+    )
+
+
+def busiest(name):
+    """Объект, у которого счётчик ``name`` больше всех."""
+    return Counter.objects.filter(name=name).order_by(
+        '-value', 'object_id'
+    ).values_list('object_id', flat=True).first()
+
+
+def routes():
+    """Запрос к каждому маршруту posts и users на самых нагруженных
+    объектах: самый комментируемый пост, самая большая группа,
+    пользователь с наибольшим числом подписок.
+
+    Возвращает пары (запрос, подготовка). Подготовка, если есть,
+    выполняется перед каждым замером вне его: подписка и отписка иначе
+    со второго раза ничего не меняют.
+    """
+    post = Post.objects.select_related('author').get(
+        pk=busiest(counters.POST_COMMENTS) or Post.objects.latest('pk').pk
+    )
+    group = Group.objects.annotate(size=Count('posts')).latest('size')
+    row = Follow.objects.values('user').annotate(
+        size=Count('id')
+    ).order_by('-size', 'user').first()
+    reader = User.objects.get(pk=row['user']) if row else post.author
+    anonymous, author, follower = Client(), Client(), Client()
+    author.force_login(post.author)
+    follower.force_login(reader)
+    followed = User.objects.filter(following__user=reader).first() or (
+        User.objects.exclude(pk=reader.pk).order_by('pk').first()
+    )
+    uid = urlsafe_base64_encode(force_bytes(reader.pk))
+    token = default_token_generator.make_token(reader)
+    by_post = {'post_id': post.pk}
+    requests = {
+        'posts:index': (anonymous.get, reverse('posts:index')),
+        'posts:group_list': (anonymous.get, reverse(
+            'posts:group_list', kwargs={'slug': group.slug})),
+        'posts:profile': (anonymous.get, reverse(
+            'posts:profile', kwargs={'username': post.author.username})),
+        'posts:post_detail': (anonymous.get, reverse(
+            'posts:post_detail', kwargs=by_post)),
+        'posts:post_comments': (anonymous.get, reverse(
+            'posts:post_comments', kwargs=by_post), {'order': 'new'}),
+        'posts:post_create': (author.get, reverse('posts:post_create')),
+        'posts:post_edit': (author.get, reverse(
+            'posts:post_edit', kwargs=by_post)),
+        'posts:add_comment': (follower.post, reverse(
+            'posts:add_comment', kwargs=by_post), {'text': 'Замер'}),
+        'posts:search': (anonymous.get, reverse('posts:search'),
+                         {'q': 'кот'}),
+        'posts:personal': (follower.get, reverse('posts:personal'), {
+            'nav': '', 'switcher': '', 'follow': post.author.username,
+            'edit': post.pk, 'comment_form': post.pk,
+        }),
+        'posts:export': (author.get, reverse('posts:export')),
+        'posts:follow_index': (follower.get, reverse('posts:follow_index')),
+        'posts:profile_follow': (follower.get, reverse(
+            'posts:profile_follow', kwargs={'username': followed.username})),
+        'posts:profile_unfollow': (follower.get, reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': followed.username})),
+        'users:signup': (anonymous.get, reverse('users:signup')),
+        'users:login': (anonymous.get, reverse('users:login')),
+        'users:logout': (Client().get, reverse('users:logout')),
+        'users:password_change': (follower.get,
+                                  reverse('users:password_change')),
+        'users:password_change_done': (
+            follower.get, reverse('users:password_change_done')),
+        'users:password_reset': (anonymous.get,
+                                 reverse('users:password_reset')),
+        'users:password_reset_done': (
+            anonymous.get, reverse('users:password_reset_done')),
+        'users:password_reset_confirm': (anonymous.get, reverse(
+            'users:password_reset_confirm',
+            kwargs={'uidb64': uid, 'token': token})),
+        'users:password_reset_complete': (
+            anonymous.get, reverse('users:password_reset_complete')),
+    }
+    follow = {'user': reader, 'author': followed}
+    preparations = {
+        'posts:profile_follow': lambda: Follow.objects.filter(
+            **follow
+        ).delete(),
+        'posts:profile_unfollow': lambda: Follow.objects.get_or_create(
+            **follow
+        ),
+    }
+    return {
+        name: (partial(method, *args), preparations.get(name))
+        for name, (method, *args) in requests.items()
+    }
+
+
+@contextmanager
+def collect_queries():
+    executed = []
+
+    def collect(execute, sql, params, many, context):
+        executed.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(collect):
+        yield executed
+
+
+def rows_fetched(executed):
+    """Сколько строк вернули SELECT-запросы; считается после замера."""
+    total = 0
+    with connection.cursor() as cursor:
+        for sql, params in executed:
+            if sql.lstrip().upper().startswith('SELECT'):
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM ({sql}) AS counted', params
+                )
+                total += cursor.fetchone()[0]
+    return total
+
+
+def body_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(send, repeat, cold, prepare=None):
+    """p50/p95 времени ответа, число запросов, строк и байт ответа.
+
+    Холодный замер очищает кэш перед каждым запросом, тёплый — один
+    раз прогревает его. Запросы и строки берутся из одного, самого
+    затратного по числу запросов повтора.
+    """
+    if not cold:
+        if prepare is not None:
+            prepare()
+        send()
+    timings, sizes, counts = [], [], []
+    gc.collect()
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+        if cold:
+            cache.clear()
+        # Сборщик мусора не должен срабатывать посреди замера.
+        gc.disable()
+        try:
+            with collect_queries() as executed:
+                started = time.perf_counter()
+                response = send()
+                sizes.append(body_size(response))
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            gc.enable()
+        if response.status_code >= 400:
+            raise BenchmarkError(f'ответ {response.status_code}')
+        # Строки считаются сразу, пока данные те же, что видел запрос.
+        counts.append((len(executed), rows_fetched(executed)))
+    queries, rows = max(counts)
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': queries,
+        'rows': rows,
+        'bytes': max(sizes),
+    }
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, len(ordered) * share // 100)]
+
+
+def measure_routes(repeat=REPEAT):
+    results = {}
+    for name, (send, prepare) in routes().items():
+        try:
+            results[name] = {
+                mode: measure(send, repeat, mode == 'cold', prepare)
+                for mode in MODES
+            }
+        except BenchmarkError as error:
+            raise BenchmarkError(f'{name}: {error}')
+    return results
+
+
+def run(sizes=SIZES, repeat=REPEAT, report=None):
+    """Замеры для каждого размера данных; ``report`` получает строки
+    о ходе работы.
+    """
+    results = {}
+    for size in sizes:
+        if report is not None:
+            report(f'Данные на {size} постов…')
+        seed(size)
+        results[str(size)] = measure_routes(repeat)
+    return {'sizes': results}
+
+
+def regressions(baseline, results, threshold=THRESHOLD):
+    """Замедления относительно эталона в виде читаемых строк.
+
+    Число запросов должно совпадать или уменьшаться; медиана времени,
+    строки и байты могут вырасти не больше чем на ``threshold``.
+    """
+    found = []
+    for size, routes_ in results['sizes'].items():
+        for name, modes in routes_.items():
+            for mode, metrics in modes.items():
+                base = baseline.get('sizes', {}).get(size, {}).get(
+                    name, {}
+                ).get(mode)
+                if base is None:
+                    continue
+                for metric, value in metrics.items():
+                    if worse(metric, base.get(metric), value, threshold):
+                        found.append(
+                            f'{name} [{size}, {mode}] {metric}: '
+                            f'{base[metric]} → {value}'
+                        )
+    return found
+
+
+def worse(metric, old, new, threshold):
+    if old is None:
+        return False
+    if metric == 'queries':
+        return new > old
+    limit = old * (1 + threshold)
+    if metric.endswith('_ms'):
+        return (
+            metric == GATED_LATENCY
+            and new > limit and new - old > LATENCY_FLOOR_MS
+        )
+    return new > limit
@@ -0,0 +1,117 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases,
+)
+
+from core import benchmarks
+
+BENCHMARKS_DIR = os.path.join(settings.BASE_DIR, 'benchmarks')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа, число SQL-запросов, строк и байт для '
+        'маршрутов posts и users на данных разного объёма и сравнивает '
+        'с эталоном. Работает на отдельной тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(map(str, benchmarks.SIZES)),
+            help='Размеры данных в постах через запятую.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=benchmarks.REPEAT,
+            help='Сколько раз повторять каждый запрос.',
+        )
+        parser.add_argument(
+            '--output',
+            default=os.path.join(BENCHMARKS_DIR, 'latest.json'),
+        )
+        parser.add_argument(
+            '--baseline',
+            default=os.path.join(BENCHMARKS_DIR, 'baseline.json'),
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=benchmarks.THRESHOLD,
+            help='Допустимый рост времени, строк и байт, доля от эталона.',
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать результат как новый эталон.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes: ожидаются числа через запятую.')
+        if options['repeat'] < 2:
+            raise CommandError('--repeat должен быть не меньше 2.')
+        results = self.run(sizes, options['repeat'])
+        self.report(results)
+        path = (
+            options['baseline'] if options['update_baseline']
+            else options['output']
+        )
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as stream:
+            json.dump(results, stream, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            stream.write('\n')
+        self.stdout.write(f'Результаты записаны в {path}')
+        if options['update_baseline']:
+            return
+        if not os.path.exists(options['baseline']):
+            self.stdout.write('Эталона нет, сравнение пропущено.')
+            return
+        with open(options['baseline']) as stream:
+            baseline = json.load(stream)
+        found = benchmarks.regressions(
+            baseline, results, options['threshold']
+        )
+        if found:
+            raise CommandError(
+                'Замедления относительно эталона:\n' + '\n'.join(found)
+            )
+        self.stdout.write('Замедлений относительно эталона нет.')
+
+    def run(self, sizes, repeat):
+        # Отдельная база, как у тестов. setup_test_environment не
+        # вызываем: он подменяет отрисовку шаблонов и искажает замеры.
+        # Метрики, журнал медленных запросов и профили тоже выключены:
+        # замеры не должны ни оплачивать их, ни попадать в них.
+        environment = override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            METRICS_FILE=None,
+            SLOW_QUERY_MS=None,
+            TEMPLATE_PROFILING=False,
+            PROFILING_SAMPLE_RATE=0,
+        )
+        environment.enable()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            return benchmarks.run(sizes, repeat, report=self.stdout.write)
+        except benchmarks.BenchmarkError as error:
+            raise CommandError(str(error))
+        finally:
+            teardown_databases(databases, verbosity=0)
+            environment.disable()
+
+    def report(self, results):
+        for size, routes in results['sizes'].items():
+            self.stdout.write(f'\n{size} постов')
+            for name, modes in routes.items():
+                line = '  '.join(
+                    f'{mode}: p50 {metrics["p50_ms"]:.1f} '
+                    f'p95 {metrics["p95_ms"]:.1f} мс, '
+                    f'{metrics["queries"]} SQL, {metrics["rows"]} строк, '
+                    f'{metrics["bytes"]} Б'
+                    for mode, metrics in modes.items()
+                )
+                self.stdout.write(f'  {name:32} {line}')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит сохранённые профили запросов в файл collapsed-стеков '
+        'для flamegraph.pl или speedscope.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='Файл результата, «-» — стандартный вывод.',
+        )
+        parser.add_argument('--view', help='Только это представление.')
+        parser.add_argument(
+            '--token', action='store_true',
+            help='Вместо сводки вывести значение заголовка X-Profile.',
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(f'{profiling.HEADER}: {profiling.make_token()}')
+            return
+        stacks = profiling.merge(
+            map(profiling.load, profiling.stored()), options['view']
+        )
+        if not stacks:
+            raise CommandError('Подходящих профилей нет.')
+        lines = [f'{stack} {count}' for stack, count in sorted(stacks.items())]
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.writelines(f'{line}\n' for line in lines)
+            self.stdout.write(
+                f'Сэмплов: {sum(stacks.values())}, записано в '
+                f'{options["output"]}'
+            )
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import querylog
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных SQL-запросов по отпечаткам: самые '
+        'тяжёлые запросы, где они выполняются и их планы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG)
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько запросов показать.',
+        )
+        parser.add_argument(
+            '--order', choices=sorted(querylog.ORDERINGS), default='total',
+            help='Сортировка: суммарное время, число или худшее время.',
+        )
+
+    def handle(self, *args, **options):
+        items = querylog.top(
+            querylog.read(options['log']), options['top'], options['order']
+        )
+        if not items:
+            self.stdout.write(f'Медленных запросов нет: {options["log"]}')
+            return
+        for number, item in enumerate(items, 1):
+            self.stdout.write(
+                f'{number}. [{item["fingerprint"]}] {item["count"]} раз, '
+                f'всего {item["total_ms"]:.0f} мс, '
+                f'худший {item["max_ms"]:.0f} мс'
+            )
+            self.stdout.write(f'   {item["sql"]}')
+            self.stdout.write(
+                f'   Представления: {", ".join(sorted(item["views"]))}'
+            )
+            for place in sorted(item['locations']):
+                self.stdout.write(f'   {place}')
+            for line in item['plan'] or ():
+                self.stdout.write(f'   план: {line}')
@@ -0,0 +1,320 @@
+"""Метрики представлений, общие для всех рабочих процессов.
+
+Счётчики лежат в файле, отображённом в память (mmap): каждый процесс
+прибавляет к ним свои значения под блокировкой файла, а /metrics
+читает сумму по всем процессам.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+# Границы корзин гистограммы времени ответа, в секундах.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FIELDS = (
+    'requests', 'duration_sum', 'queries', 'query_seconds', 'cache_hits',
+    'cache_misses', 'response_bytes',
+) + tuple(f'bucket_{index}' for index in range(len(BUCKETS)))
+KEY_SIZE = 64
+UNRESOLVED = '<unresolved>'
+
+local = threading.local()
+
+
+class SharedCounters:
+    """Таблица счётчиков с фиксированными слотами по имени представления.
+
+    Слот, раз заняв место в файле, больше не двигается, поэтому процесс
+    запоминает его смещение. Потоки одного процесса разделяют
+    дескриптор файла, и flock их не различает, так что поверх него
+    стоит ещё и обычная блокировка.
+    """
+
+    def __init__(self, path, slots, fields=FIELDS):
+        self.path = path
+        self.slots = slots
+        self.fields = fields
+        self.slot_size = KEY_SIZE + 8 * len(fields)
+        self.offsets = {}
+        self.lock = threading.Lock()
+        size = slots * self.slot_size
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+
+    @contextmanager
+    def locked(self, operation=fcntl.LOCK_EX):
+        with self.lock:
+            fcntl.flock(self.fd, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def values(self, offset):
+        start = offset + KEY_SIZE
+        return memoryview(self.map)[
+            start:start + 8 * len(self.fields)
+        ].cast('d')
+
+    def keys(self):
+        for slot in range(self.slots):
+            offset = slot * self.slot_size
+            key = bytes(self.map[offset:offset + KEY_SIZE]).rstrip(b'\0')
+            if not key:
+                return
+            yield key, offset
+
+    def offset(self, name):
+        """Смещение слота ``name`` или None, если слоты кончились.
+
+        Вызывается под блокировкой: слот мог занять другой процесс.
+        """
+        if name not in self.offsets:
+            key = name.encode()[:KEY_SIZE]
+            offset = next(
+                (found for existing, found in self.keys() if existing == key),
+                None,
+            )
+            if offset is None:
+                offset = self.allocate(key)
+            if offset is None:
+                return None
+            self.offsets[name] = offset
+        return self.offsets[name]
+
+    def allocate(self, key):
+        slot = sum(1 for _ in self.keys())
+        if slot >= self.slots:
+            return None
+        offset = slot * self.slot_size
+        self.map[offset:offset + len(key)] = key
+        return offset
+
+    def add(self, name, deltas):
+        with self.locked():
+            offset = self.offset(name)
+            if offset is None:
+                return
+            values = self.values(offset)
+            for field, delta in deltas.items():
+                values[self.fields.index(field)] += delta
+
+    def snapshot(self):
+        with self.locked(fcntl.LOCK_SH):
+            return {
+                key.decode(errors='replace'): dict(
+                    zip(self.fields, self.values(offset).tolist())
+                )
+                for key, offset in self.keys()
+            }
+
+
+_counters = {}
+
+
+def layout(slots, fields):
+    """Отпечаток раскладки слотов. Он входит в имя файла: после смены
+    полей или числа слотов процессы не читают старый файл по новой
+    раскладке.
+    """
+    raw = repr((KEY_SIZE, slots, tuple(fields))).encode()
+    return hashlib.sha1(raw).hexdigest()[:8]
+
+
+def shared_counters(suffix='', fields=FIELDS):
+    """Счётчики в ``METRICS_FILE`` или в соседнем файле с ``suffix``."""
+    slots = settings.METRICS_SLOTS
+    path = f'{settings.METRICS_FILE}{suffix}.{layout(slots, fields)}'
+    # Открытый до fork файл делит блокировку flock с родителем, поэтому
+    # каждый процесс открывает файл сам.
+    key = (path, os.getpid())
+    if key not in _counters:
+        _counters[key] = SharedCounters(path, slots, fields)
+    return _counters[key]
+
+
+class Sample:
+    """Показатели одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+
+
+def count_cache(hits, misses):
+    sample = getattr(local, 'sample', None)
+    if sample is not None and not getattr(local, 'in_get_many', False):
+        sample.cache_hits += hits
+        sample.cache_misses += misses
+
+
+def instrument_cache(backend):
+    """Считает попадания и промахи ``get`` и ``get_many`` экземпляра.
+
+    Подменяются методы самого экземпляра, поэтому подходит любой бэкенд
+    кэша. Базовый ``get_many`` вызывает ``get`` по ключу — такие
+    вложенные вызовы не учитываются повторно.
+    """
+    if getattr(backend, 'metered', False):
+        return
+    missing = object()
+    get, get_many = backend.get, backend.get_many
+
+    def metered_get(key, default=None, version=None):
+        value = get(key, missing, version=version)
+        count_cache(value is not missing, value is missing)
+        return default if value is missing else value
+
+    def metered_get_many(keys, version=None):
+        keys = list(keys)
+        local.in_get_many = True
+        try:
+            found = get_many(keys, version=version)
+        finally:
+            local.in_get_many = False
+        count_cache(len(found), len(keys) - len(found))
+        return found
+
+    backend.get, backend.get_many = metered_get, metered_get_many
+    backend.metered = True
+
+
+def response_size(response):
+    # Длина потокового ответа заранее неизвестна, его не читаем.
+    if response.streaming:
+        return int(response.get('Content-Length', 0))
+    return len(response.content)
+
+
+def bucket_field(duration):
+    for index, bound in enumerate(BUCKETS):
+        if duration <= bound:
+            return f'bucket_{index}'
+    return None
+
+
+class MetricsMiddleware:
+    """Время ответа, SQL, кэш и размер ответа по имени представления."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_FILE:
+            return self.get_response(request)
+        for alias in settings.CACHES:
+            instrument_cache(caches[alias])
+        sample = local.sample = Sample()
+        started = time.perf_counter()
+        try:
+            with _query_wrappers(sample):
+                response = self.get_response(request)
+        finally:
+            local.sample = None
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        deltas = {
+            'requests': 1,
+            'duration_sum': duration,
+            'queries': sample.queries,
+            'query_seconds': sample.query_seconds,
+            'cache_hits': sample.cache_hits,
+            'cache_misses': sample.cache_misses,
+            'response_bytes': response_size(response),
+        }
+        field = bucket_field(duration)
+        if field is not None:
+            deltas[field] = 1
+        shared_counters().add(
+            match.view_name if match else UNRESOLVED, deltas
+        )
+        return response
+
+
+@contextmanager
+def _query_wrappers(sample):
+    wrappers = [
+        connections[alias].execute_wrapper(sample)
+        for alias in connections
+    ]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def number(value):
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+COUNTERS = (
+    ('yatube_sql_queries_total', 'queries', 'Число SQL-запросов.'),
+    ('yatube_sql_duration_seconds_total', 'query_seconds',
+     'Время SQL-запросов.'),
+    ('yatube_cache_hits_total', 'cache_hits', 'Попадания в кэш.'),
+    ('yatube_cache_misses_total', 'cache_misses', 'Промахи кэша.'),
+    ('yatube_response_bytes_total', 'response_bytes',
+     'Объём ответов без потоковых.'),
+)
+
+
+def render(snapshot):
+    """Метрики в текстовом формате Prometheus."""
+    views = sorted(snapshot)
+    histogram = 'yatube_request_duration_seconds'
+    lines = [
+        f'# HELP {histogram} Время ответа представления.',
+        f'# TYPE {histogram} histogram',
+    ]
+    for view in views:
+        values = snapshot[view]
+        label = f'view="{escape(view)}"'
+        total = 0
+        for index, bound in enumerate(BUCKETS):
+            total += values[f'bucket_{index}']
+            lines.append(
+                f'{histogram}_bucket{{{label},le="{bound}"}} {number(total)}'
+            )
+        lines += [
+            f'{histogram}_bucket{{{label},le="+Inf"}} '
+            f'{number(values["requests"])}',
+            f'{histogram}_sum{{{label}}} {number(values["duration_sum"])}',
+            f'{histogram}_count{{{label}}} {number(values["requests"])}',
+        ]
+    for name, field, description in COUNTERS:
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+        lines += [
+            f'{name}{{view="{escape(view)}"}} '
+            f'{number(snapshot[view][field])}'
+            for view in views
+        ]
+    return '\n'.join(lines) + '\n'
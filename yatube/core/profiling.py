@@ -0,0 +1,174 @@
+"""Выборочный профиль запросов.
+
+Доля ``PROFILING_SAMPLE_RATE`` запросов, а также запросы сотрудников
+с параметром ``?profile`` и запросы с подписанным заголовком
+X-Profile снимаются статистически: отдельный поток каждые
+``PROFILING_INTERVAL`` секунд запоминает стек потока запроса. Профили
+лежат в ``PROFILING_DIR``, где остаются только ``PROFILING_KEEP``
+последних; команда collapse_profiles сводит их для flame graph.
+"""
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+HEADER = 'X-Profile'
+QUERY_FLAG = 'profile'
+SALT = 'core.profiling'
+UNRESOLVED = '<unresolved>'
+
+
+def make_token():
+    """Значение заголовка X-Profile, действует ``PROFILING_TOKEN_AGE``."""
+    return signing.dumps('profile', salt=SALT)
+
+
+def trigger(request):
+    """Почему запрос профилируется, или None."""
+    token = request.META.get('HTTP_X_PROFILE')
+    if token:
+        try:
+            signing.loads(
+                token, salt=SALT, max_age=settings.PROFILING_TOKEN_AGE
+            )
+            return 'header'
+        except signing.BadSignature:
+            pass
+    user = getattr(request, 'user', None)
+    if QUERY_FLAG in request.GET and user is not None and user.is_staff:
+        return 'staff'
+    if random.random() < settings.PROFILING_SAMPLE_RATE:
+        return 'sample'
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def frame_label(code):
+    path = code.co_filename
+    if path.startswith(settings.BASE_DIR):
+        path = os.path.relpath(path, settings.BASE_DIR)
+    elif 'site-packages' in path:
+        path = path.split('site-packages' + os.sep, 1)[1]
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Стек от корня к ``frame`` в формате collapsed: через точку
+    с запятой.
+    """
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Sampler(threading.Thread):
+    """Снимает стек потока ``thread_id`` до вызова ``stop``."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+        return self.stacks
+
+
+def save(profile, directory=None):
+    """Пишет профиль и удаляет самые старые сверх ``PROFILING_KEEP``."""
+    directory = directory or settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = f'{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.json'
+    path = os.path.join(directory, name)
+    with open(path + '.tmp', 'w', encoding='utf-8') as stream:
+        json.dump(profile, stream, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+    for old in stored(directory)[:-settings.PROFILING_KEEP]:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+    return name
+
+
+def stored(directory=None):
+    """Файлы профилей от старых к новым."""
+    directory = directory or settings.PROFILING_DIR
+    if not os.path.isdir(directory):
+        return []
+    # Имя начинается с времени в наносекундах одинаковой длины.
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory)) if name.endswith('.json')
+    ]
+
+
+def load(path):
+    try:
+        with open(path, encoding='utf-8') as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        # Профиль могли удалить или дописывать прямо сейчас.
+        return None
+
+
+def merge(profiles, view=None):
+    """Сумма сэмплов; корень каждого стека — имя представления."""
+    stacks = Counter()
+    for profile in profiles:
+        if profile is None or view not in (None, profile['view']):
+            continue
+        for stack, count in profile['samples'].items():
+            stacks[f'{profile["view"]};{stack}'] += count
+    return stacks
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reason = trigger(request)
+        if reason is None:
+            return self.get_response(request)
+        sampler = Sampler(threading.get_ident(), settings.PROFILING_INTERVAL)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = sampler.stop()
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        name = save({
+            'view': match.view_name if match else UNRESOLVED,
+            'path': request.path,
+            'method': request.method,
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'interval': settings.PROFILING_INTERVAL,
+            'trigger': reason,
+            'samples': samples,
+        })
+        if reason != 'sample':
+            response['X-Profile-Id'] = name
+        return response
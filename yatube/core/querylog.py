@@ -0,0 +1,229 @@
+"""Журнал медленных SQL-запросов.
+
+Запрос дольше ``SLOW_QUERY_MS`` попадает в ``SLOW_QUERY_LOG`` строкой
+JSON: представление, место в коде и в шаблоне и план запроса.
+Параметры запроса (тексты, адреса почты, токены) пишутся, только если
+включён ``SLOW_QUERY_LOG_PARAMS``. Команда slow_queries сводит журнал
+по отпечаткам запросов.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED = '<unresolved>'
+PARAM_LENGTH = 200
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+# Обёртки запросов сами лежат в проекте, но местом запроса не считаются.
+INSTRUMENTATION = ('core.metrics', 'core.querylog')
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER = re.compile(r'%s|\?')
+IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL без значений: литералы и параметры заменены на ``?``,
+    списки в IN свёрнуты, чтобы IN с разным числом значений совпадали.
+    """
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = PLACEHOLDER.sub('?', sql)
+    sql = IN_LIST.sub('(...)', sql)
+    return SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def relative(path):
+    return os.path.relpath(path, settings.BASE_DIR)
+
+
+def is_project_code(frame):
+    path = frame.f_code.co_filename
+    return (
+        path.startswith(settings.BASE_DIR)
+        and 'site-packages' not in path
+        and frame.f_globals.get('__name__') not in INSTRUMENTATION
+    )
+
+
+def location():
+    """Ближайшие к запросу строка кода проекта и узел шаблона."""
+    code = template = None
+    frame = sys._getframe(1)
+    while frame is not None and (code is None or template is None):
+        node = frame.f_locals.get('self')
+        if template is None and isinstance(node, Node):
+            origin, token = getattr(node, 'origin', None), node.token
+            if origin is not None and token is not None:
+                name = origin.template_name or origin.name
+                template = f'{name}:{token.lineno}'
+        if code is None and is_project_code(frame):
+            code = (
+                f'{relative(frame.f_code.co_filename)}:{frame.f_lineno} '
+                f'in {frame.f_code.co_name}'
+            )
+        frame = frame.f_back
+    return code, template
+
+
+def explain(connection, sql, params):
+    """План запроса; отдельный курсор не проходит через обёртки."""
+    if not sql.lstrip().upper().startswith(EXPLAINED):
+        return None
+    prefix = (
+        'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    )
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'{prefix} {sql}', params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN не удался: {error}']
+    finally:
+        cursor.close()
+
+
+def short(value):
+    value = repr(value)
+    if len(value) > PARAM_LENGTH:
+        return value[:PARAM_LENGTH] + '…'
+    return value
+
+
+def write(entry, path=None):
+    path = path or settings.SLOW_QUERY_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Одна запись на строку: дописывание из разных процессов не
+    # перемешивает строки.
+    with open(path, 'a', encoding='utf-8') as stream:
+        stream.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+class SlowQueryLog:
+    """Обёртка execute_wrapper, пишущая медленные запросы ``request``."""
+
+    def __init__(self, request, alias, threshold_ms):
+        self.request = request
+        self.alias = alias
+        self.threshold_ms = threshold_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= self.threshold_ms:
+            self.record(sql, params, many, duration_ms)
+        return result
+
+    def record(self, sql, params, many, duration_ms):
+        match = self.request.resolver_match
+        code, template = location()
+        connection = connections[self.alias]
+        entry = {
+            'time': timezone.now().isoformat(),
+            'fingerprint': fingerprint(sql),
+            'duration_ms': round(duration_ms, 3),
+            'view': match.view_name if match else UNRESOLVED,
+            'path': self.request.path,
+            'code': code,
+            'template': template,
+            'sql': sql,
+            'plan': None if many else explain(connection, sql, params),
+        }
+        if settings.SLOW_QUERY_LOG_PARAMS:
+            entry['params'] = (
+                f'{len(params)} наборов' if many
+                else [short(param) for param in params or ()]
+            )
+        logger.warning(
+            'Медленный запрос %.0f мс в %s (%s)',
+            duration_ms, entry['view'], code,
+        )
+        write(entry)
+
+
+class SlowQueryMiddleware:
+    """Следит за запросами ко всем базам во время обработки запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold_ms = settings.SLOW_QUERY_MS
+        if threshold_ms is None:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(
+                    SlowQueryLog(request, alias, threshold_ms)
+                ))
+            return self.get_response(request)
+
+
+def read(path):
+    """Записи журнала; повреждённые строки пропускаются."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as stream:
+        for line in stream:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def aggregate(entries):
+    """Сводка по отпечаткам: число, суммарное и худшее время, где
+    встречался запрос и план самого медленного из них.
+    """
+    summary = {}
+    for entry in entries:
+        item = summary.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'sql': normalize(entry['sql']),
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'views': set(),
+            'locations': set(),
+            'plan': None,
+        })
+        item['count'] += 1
+        item['total_ms'] += entry['duration_ms']
+        item['views'].add(entry['view'])
+        item['locations'].update(
+            place for place in (entry['code'], entry['template']) if place
+        )
+        if entry['duration_ms'] >= item['max_ms']:
+            item['max_ms'] = entry['duration_ms']
+            item['plan'] = entry['plan']
+    return list(summary.values())
+
+
+ORDERINGS = {
+    'total': lambda item: item['total_ms'],
+    'count': lambda item: item['count'],
+    'max': lambda item: item['max_ms'],
+}
+
+
+def top(entries, limit, order='total'):
+    return sorted(aggregate(entries), key=ORDERINGS[order],
+                  reverse=True)[:limit]
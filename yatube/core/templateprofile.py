@@ -0,0 +1,171 @@
+"""Профиль отрисовки шаблонов по запросу.
+
+Включается настройкой ``TEMPLATE_PROFILING``. Время каждого шаблона,
+include, block, собственного тега и фильтра (например, thumbnail и
+addclass) уходит в заголовок Server-Timing ответа и копится в общих
+счётчиках, которые /metrics показывает вместе с метриками
+представлений. Время вложенных узлов входит во время внешних.
+"""
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template import engines
+from django.template.base import Node, Template
+from django.template.library import InclusionNode, SimpleNode
+from django.template.loader_tags import BlockNode, IncludeNode
+
+from . import metrics
+
+FIELDS = ('renders', 'seconds')
+COUNTERS_SUFFIX = '.templates'
+# Сколько самых долгих узлов попадает в Server-Timing.
+SERVER_TIMING_LIMIT = 20
+
+local = threading.local()
+_installed = False
+
+
+def timed(label, function, *args, **kwargs):
+    timings = getattr(local, 'timings', None)
+    if timings is None:
+        return function(*args, **kwargs)
+    started = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        entry = timings.setdefault(label, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - started
+
+
+def node_label(node):
+    """Подпись узла или None, если узел не замеряется.
+
+    Встроенные теги Django, кроме include и block, не замеряются:
+    их слишком много, а время они тратят на вложенные узлы.
+    """
+    if isinstance(node, IncludeNode):
+        return f'include:{node.template.var}'
+    if isinstance(node, BlockNode):
+        return f'block:{node.name}'
+    if (
+        isinstance(node, (SimpleNode, InclusionNode))
+        or not type(node).__module__.startswith('django.')
+    ):
+        token = getattr(node, 'token', None)
+        name = token.split_contents()[0] if token else type(node).__name__
+        return f'tag:{name}'
+    return None
+
+
+def profile_filter(name, function):
+    @functools.wraps(function)
+    def profiled(*args, **kwargs):
+        return timed(f'filter:{name}', function, *args, **kwargs)
+    return profiled
+
+
+def install():
+    """Подменяет отрисовку узлов и шаблонов и собственные фильтры.
+
+    Фильтры подменяются в библиотеках, поэтому попадают только в
+    шаблоны, скомпилированные после установки.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    render_annotated, render = Node.render_annotated, Template.render
+
+    def profiled_render_annotated(self, context):
+        if getattr(local, 'timings', None) is None:
+            return render_annotated(self, context)
+        if 'profile_label' not in self.__dict__:
+            self.profile_label = node_label(self)
+        label = self.profile_label
+        if label is None:
+            return render_annotated(self, context)
+        return timed(label, render_annotated, self, context)
+
+    def profiled_render(self, context):
+        name = self.origin.template_name or self.origin.name
+        return timed(f'template:{name}', render, self, context)
+
+    Node.render_annotated = profiled_render_annotated
+    Template.render = profiled_render
+    profile_filters()
+
+
+def profile_filters():
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for library in (
+            *engine.template_builtins, *engine.template_libraries.values()
+        ):
+            for name, function in list(library.filters.items()):
+                if not function.__module__.startswith('django.'):
+                    library.filters[name] = profile_filter(name, function)
+
+
+def quote(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def server_timing(timings, limit=SERVER_TIMING_LIMIT):
+    """Значение заголовка Server-Timing: самые долгие узлы первыми."""
+    ordered = sorted(
+        timings.items(), key=lambda item: item[1][1], reverse=True
+    )[:limit]
+    return ', '.join(
+        f'tpl{index};dur={seconds * 1000:.2f};'
+        f'desc="{quote(label)} x{count}"'
+        for index, (label, (count, seconds)) in enumerate(ordered, 1)
+    )
+
+
+def template_counters():
+    return metrics.shared_counters(COUNTERS_SUFFIX, FIELDS)
+
+
+class TemplateProfileMiddleware:
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        local.timings = {}
+        try:
+            response = self.get_response(request)
+        finally:
+            timings, local.timings = local.timings, None
+        if timings:
+            response['Server-Timing'] = server_timing(timings)
+            counters = template_counters()
+            for label, (count, seconds) in timings.items():
+                counters.add(label, {'renders': count, 'seconds': seconds})
+        return response
+
+
+def render(snapshot):
+    """Накопленные замеры в текстовом формате Prometheus."""
+    lines = []
+    for name, field, description in (
+        ('yatube_template_renders_total', 'renders',
+         'Число отрисовок узла шаблона.'),
+        ('yatube_template_render_seconds_total', 'seconds',
+         'Время отрисовки узла шаблона с вложенными.'),
+    ):
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+        lines += [
+            f'{name}{{node="{metrics.escape(label)}"}} '
+            f'{metrics.number(snapshot[label][field])}'
+            for label in sorted(snapshot)
+        ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,69 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class QueryBudgetMixin:
+    """Проверки для TestCase: код укладывается в бюджет SQL-запросов."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, label=''):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f'{label}: {executed} SQL-запросов при бюджете {budget}:\n'
+                f'{queries}'
+            )
+
+
+def plan_problems(sql, params, allowed_scans=()):
+    """Строки EXPLAIN QUERY PLAN с полным просмотром или сортировкой.
+
+    ``allowed_scans`` перечисляет таблицы, которые можно просматривать
+    целиком, и может содержать ``TEMP_SORT``.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        details = [row[-1] for row in cursor.fetchall()]
+    problems = []
+    for detail in details:
+        scan = FULL_SCAN.match(detail)
+        if scan and scan.group('table') not in allowed_scans:
+            problems.append(detail)
+        elif detail == TEMP_SORT and TEMP_SORT not in allowed_scans:
+            problems.append(detail)
+    return problems
+
+
+class QueryPlanMixin:
+    """Проверки для TestCase: запросы используют индексы (только SQLite)."""
+
+    @contextmanager
+    def assertIndexedQueries(self, label='', allowed_scans=()):
+        executed = []
+
+        def collect(execute, sql, params, many, context):
+            executed.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(collect):
+            yield executed
+        for sql, params in executed:
+            if not sql.lstrip().upper().startswith(
+                ('SELECT', 'UPDATE', 'DELETE')
+            ):
+                continue
+            problems = plan_problems(sql, params, allowed_scans)
+            if problems:
+                self.fail(f'{label}: {"; ".join(problems)}\n{sql}')
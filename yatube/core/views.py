@@ -1,4 +1,11 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+from . import metrics as view_metrics
+from . import templateprofile
 
 
 def page_not_found(request, exception):
@@ -16,3 +23,40 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def metrics_allowed(request):
+    """С ``METRICS_TOKEN`` нужен заголовок ``Authorization: Bearer``.
+    Без токена пускаются только прямые запросы с ``METRICS_ALLOWED_IPS``:
+    за обратным прокси на той же машине адрес всегда локальный, поэтому
+    запрос с X-Forwarded-For не пускается.
+    """
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.META.get(
+            'HTTP_AUTHORIZATION', ''
+        ).partition(' ')
+        return scheme.lower() == 'bearer' and constant_time_compare(
+            token, settings.METRICS_TOKEN
+        )
+    return (
+        'HTTP_X_FORWARDED_FOR' not in request.META
+        and request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    )
+
+
+@never_cache
+def metrics(request):
+    """Метрики представлений для Prometheus."""
+    if not settings.METRICS_FILE:
+        raise Http404
+    if not metrics_allowed(request):
+        return permission_denied(request, None)
+    body = view_metrics.render(view_metrics.shared_counters().snapshot())
+    if settings.TEMPLATE_PROFILING:
+        body += templateprofile.render(
+            templateprofile.template_counters().snapshot()
+        )
+    return HttpResponse(
+        body,
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
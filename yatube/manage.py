@@ -5,7 +5,12 @@ import sys
 
 
 def main():
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    # Тесты запускаются со своими настройками (yatube.settings_test).
+    testing = sys.argv[1:2] == ['test']
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE',
+        'yatube.settings_test' if testing else 'yatube.settings',
+    )
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
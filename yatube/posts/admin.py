@@ -1,15 +1,54 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 
+from . import counters
 from .models import Group, Post
+from .search import filter_matching
+
+
+class EstimatedCountPaginator(Paginator):
+    """Без фильтров берёт число постов из счётчика, с фильтрами считает
+    не дальше ``ADMIN_COUNT_LIMIT`` строк.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return counters.get(counters.ALL_POSTS, 0)
+        return queryset.order_by()[:settings.ADMIN_COUNT_LIMIT].count()
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    ordering = ('-pub_date', '-id')
+    raw_id_fields = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group' and request is not None:
+            # Список групп один на все строки списка, а не запрос на строку.
+            choices = getattr(request, '_group_choices', None)
+            if choices is None:
+                choices = request._group_choices = list(field.choices)
+            field.choices = choices
+        return field
+
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу, а не LIKE '%...%' по таблице.
+        if not search_term.strip():
+            return queryset, False
+        return filter_matching(queryset, search_term), False
+
 
 class ArticleAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
@@ -0,0 +1,227 @@
+"""Версия 1 JSON API лент только для чтения.
+
+Ответы строятся из ``values()`` тех же выборок, что и HTML-страницы,
+листаются курсорами ``after``/``before`` и отдают только поля из
+``?fields=``.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.gzip import gzip_page
+
+from .caching import cache_versioned
+from .feed import FeedPaginator
+from .models import FeedItem, Group, Post
+from .paginators import POST_ORDERING, CursorPaginator
+from .views import (
+    COMMENT_ORDERINGS, COMMENTS_PER_PAGE, MAX_POSTS, comment_order,
+    feed_posts, post_comment_list, post_detail_scopes,
+)
+
+# Имя поля в ответе и выражение для values().
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def json_response(data, status=200):
+    # Компактный и стабильный вывод хорошо сжимается gzip.
+    content = json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return HttpResponse(
+        content, status=status, content_type='application/json'
+    )
+
+
+def api_view(view):
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response({'detail': str(error)}, error.status)
+    return gzip_page(wrapper)
+
+
+def weak_etag(view):
+    """ETag из поколений один для сжатого и несжатого ответа, поэтому он
+    слабый, а ответ, как и 304, зависит от Accept-Encoding.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = f'W/{etag}'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+    return wrapper
+
+
+def cached_api_view(scopes):
+    """``api_view``, закэшированное по поколениям ``scopes``."""
+    def decorator(view):
+        return weak_etag(cache_versioned(scopes)(api_view(view)))
+    return decorator
+
+
+def requested_fields(request, available):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [field for field in raw.split(',') if field]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def serialize(row, fields, available):
+    item = {field: row[available[field]] for field in fields}
+    if 'image' in item:
+        item['image'] = (
+            settings.MEDIA_URL + item['image'] if item['image'] else None
+        )
+    return item
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    """Курсорная пагинация по строкам ``values()``."""
+
+    def cursor_values(self, obj):
+        return tuple(obj[field.lstrip('-')] for field in self.ordering)
+
+
+class ValuesFeedPaginator(ValuesCursorPaginator, FeedPaginator):
+    """Лента подписок строками ``values()`` с полями ``lookups``."""
+
+    def __init__(self, user, per_page, lookups):
+        super().__init__(user, per_page)
+        self.lookups = lookups
+        self.object_list = Post.objects.values(*lookups)
+
+    def inbox(self):
+        return FeedItem.objects.filter(user=self.user).values(
+            *(f'post__{lookup}' for lookup in self.lookups)
+        )
+
+    def inbox_posts(self, items):
+        return [
+            {lookup: item[f'post__{lookup}'] for lookup in self.lookups}
+            for item in items
+        ]
+
+
+def cursor_page(request, queryset, available, ordering, per_page):
+    fields = requested_fields(request, available)
+    lookups = {available[field] for field in fields}
+    lookups.update(field.lstrip('-') for field in ordering)
+    paginator = ValuesCursorPaginator(
+        queryset.values(*lookups).order_by(*ordering), per_page,
+        ordering=ordering,
+    )
+    page = paginator.get_cursor_page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    return json_response({
+        'results': [serialize(row, fields, available) for row in page],
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    })
+
+
+def get_or_error(queryset, **lookups):
+    obj = queryset.filter(**lookups).first()
+    if obj is None:
+        raise ApiError('Не найдено.', status=404)
+    return obj
+
+
+@cached_api_view(lambda: ['all'])
+def posts(request):
+    return cursor_page(
+        request, feed_posts(), POST_FIELDS, POST_ORDERING, MAX_POSTS
+    )
+
+
+@cached_api_view(lambda slug: [f'group:{slug}'])
+def group_posts(request, slug):
+    group = get_or_error(Group.objects.only('pk'), slug=slug)
+    return cursor_page(
+        request, feed_posts().filter(group=group), POST_FIELDS,
+        POST_ORDERING, MAX_POSTS,
+    )
+
+
+@cached_api_view(lambda username: [f'author:{username}'])
+def profile_posts(request, username):
+    author = get_or_error(User.objects.only('pk'), username=username)
+    return cursor_page(
+        request, feed_posts().filter(author=author), POST_FIELDS,
+        POST_ORDERING, MAX_POSTS,
+    )
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация.', status=401)
+    fields = requested_fields(request, POST_FIELDS)
+    lookups = {POST_FIELDS[field] for field in fields}
+    lookups.update(field.lstrip('-') for field in POST_ORDERING)
+    paginator = ValuesFeedPaginator(request.user, MAX_POSTS, lookups)
+    page = paginator.get_cursor_page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    response = json_response({
+        'results': [serialize(row, fields, POST_FIELDS) for row in page],
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    })
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@cached_api_view(post_detail_scopes)
+def post(request, post_id):
+    fields = requested_fields(request, POST_FIELDS)
+    row = get_or_error(
+        Post.objects.values(*{POST_FIELDS[field] for field in fields}),
+        pk=post_id,
+    )
+    return json_response(serialize(row, fields, POST_FIELDS))
+
+
+@cached_api_view(lambda post_id: [f'post:{post_id}'])
+def post_comments(request, post_id):
+    get_or_error(Post.objects.only('pk'), pk=post_id)
+    order = comment_order(request)
+    return cursor_page(
+        request, post_comment_list(post_id, order), COMMENT_FIELDS,
+        COMMENT_ORDERINGS[order], COMMENTS_PER_PAGE,
+    )
@@ -0,0 +1,180 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.cache import (
+    add_never_cache_headers, get_conditional_response, patch_cache_control,
+    patch_response_headers,
+)
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import cache_page
+
+from .models import Group
+
+GENERATION_KEY = 'posts:generation:{}'
+MODIFIED_KEY = 'posts:modified:{}'
+# Параметр адреса, по которому общая страница отрисовывается с личными
+# частями: для браузеров без JS.
+PERSONAL_PARAM = 'personal'
+
+
+def fresh_generation():
+    # Счётчик, вытесненный из кэша, не должен начаться с уже
+    # использованного значения, поэтому стартуем от текущего времени.
+    return int(time.time() * 1000)
+
+
+def shared_generations():
+    """Видны ли поколения всем рабочим процессам.
+
+    Поколения в LocMemCache живут в памяти процесса: изменение, сделанное
+    другим процессом или командой, их не увеличивает.
+    """
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def page_timeout():
+    """Срок хранения страниц и карточек; с локальным кэшем он короткий."""
+    if shared_generations():
+        return settings.POSTS_CACHE_TIMEOUT
+    return settings.POSTS_LOCAL_CACHE_TIMEOUT
+
+
+def generations(scopes):
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for scope, key in zip(scopes, keys):
+        if key not in values:
+            cache.add(key, fresh_generation(), None)
+            cache.add(MODIFIED_KEY.format(scope), int(time.time()), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def generation_token(scopes):
+    raw = '.'.join(
+        f'{scope}={value}'
+        for scope, value in zip(scopes, generations(scopes))
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, fresh_generation(), None)
+    # Last-Modified точен до секунды: страница, отданная в ту же
+    # секунду до изменения, не должна получить 304.
+    modified = int(time.time()) + 1
+    cache.set_many(
+        {MODIFIED_KEY.format(scope): modified for scope in scopes}, None
+    )
+
+
+def last_modified(scopes):
+    """Время последнего изменения областей или None, если неизвестно."""
+    keys = [MODIFIED_KEY.format(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    if len(values) < len(keys):
+        return None
+    return max(values.values())
+
+
+def validators(request, token, scopes):
+    """ETag и Last-Modified страницы без обращений к базе.
+
+    Страница одинакова для всех пользователей и зависит только от
+    поколений её областей и адреса.
+    """
+    raw = f'{token}:{request.get_full_path()}'
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    return etag, last_modified(scopes)
+
+
+def invalidate_post(post, group_ids):
+    group_ids = [group_id for group_id in group_ids if group_id is not None]
+    slugs = Group.objects.filter(
+        pk__in=group_ids
+    ).values_list('slug', flat=True) if group_ids else []
+    bump(
+        'all',
+        f'author:{post.author.username}',
+        f'post:{post.pk}',
+        *(f'group:{slug}' for slug in slugs)
+    )
+
+
+def personal_url(request):
+    query = request.GET.copy()
+    query[PERSONAL_PARAM] = ''
+    return f'{request.path}?{query.urlencode()}'
+
+
+def revalidate(response):
+    """Браузеры и общие кэши сверяют общую страницу перед каждой выдачей.
+
+    Заголовки ставятся после ``cache_page``: с ``max-age=0`` он не
+    сохранил бы страницу в кэш.
+    """
+    del response['Expires']
+    patch_response_headers(response, cache_timeout=0)
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def cache_versioned(scopes):
+    """Кэширует страницу, пока не изменятся поколения её областей.
+
+    ``scopes`` получает аргументы представления и возвращает список
+    областей вида ``all``, ``group:<slug>``, ``author:<username>``,
+    ``post:<id>``; сигналы моделей увеличивают их поколения. По тем же
+    поколениям строятся ETag и Last-Modified, если поколения общие для
+    процессов: совпавший условный запрос получает 304 без отрисовки
+    шаблонов. Страница не зависит от пользователя, поэтому одна копия в
+    кэше обслуживает всех.
+
+    С параметром ``personal`` страница отрисовывается вместе с личными
+    частями и не кэшируется: так её видят браузеры без JS.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if PERSONAL_PARAM in request.GET:
+                response = view(request, *args, **kwargs)
+                add_never_cache_headers(response)
+                return response
+            # Шаблоны общих страниц не обращаются к пользователю: личные
+            # части подгружаются отдельно (posts:personal).
+            request.shared_page = True
+            request.personal_url = personal_url(request)
+            page_scopes = scopes(*args, **kwargs)
+            prefix = generation_token(page_scopes)
+            cached_view = cache_page(page_timeout(), key_prefix=prefix)(view)
+            if request.method not in ('GET', 'HEAD'):
+                return revalidate(cached_view(request, *args, **kwargs))
+            if not shared_generations():
+                # ETag из поколений процесса не заметит чужих изменений, и
+                # браузер получал бы 304 бессрочно: без валидаторов
+                # устаревание ограничено сроком кэша страницы.
+                return revalidate(cached_view(request, *args, **kwargs))
+            etag, modified = validators(request, prefix, page_scopes)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=modified
+            )
+            if response is None:
+                response = cached_view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if modified is not None:
+                    response['Last-Modified'] = http_date(modified)
+            # Страница общая для всех: общие кэши могут её хранить, но
+            # обязаны сверять по ETag перед выдачей.
+            return revalidate(response)
+        return wrapper
+    return decorator
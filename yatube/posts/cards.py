@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import caching, thumbnails
+
+# Увеличивается при любом изменении разметки карточек.
+CARD_VERSION = 1
+CARD_KEY = 'posts:card:{version}:{template}:{pk}:{updated}:{generation}'
+
+
+def card_scopes(post):
+    """Области поколений карточки: автор, группа и миниатюры поста.
+
+    Правки самого поста меняют ``updated_at``, а имя автора, название
+    группы и готовность миниатюр — поколения этих областей, и
+    ``updated_at`` (время правки в API) остаётся прежним.
+    """
+    scopes = [f'card:author:{post.author_id}', f'card:post:{post.pk}']
+    if post.group_id is not None:
+        scopes.append(f'card:group:{post.group_id}')
+    return scopes
+
+
+def card_key(post, template, generations):
+    return CARD_KEY.format(
+        version=CARD_VERSION,
+        template=template,
+        pk=post.pk,
+        updated=post.updated_at.timestamp(),
+        generation='.'.join(
+            str(generations[scope]) for scope in card_scopes(post)
+        ),
+    )
+
+
+def attach(page_obj, template):
+    """Прикрепляет к постам страницы готовую разметку карточек.
+
+    Поколения и карточки берутся из кэша двумя ``get_many``;
+    отрисовываются только отсутствующие, и лишь для них ищутся миниатюры.
+    """
+    posts = list(page_obj)
+    scopes = list(dict.fromkeys(
+        scope for post in posts for scope in card_scopes(post)
+    ))
+    generations = dict(zip(scopes, caching.generations(scopes)))
+    keys = {card_key(post, template, generations): post for post in posts}
+    found = cache.get_many(list(keys))
+    missing = [post for key, post in keys.items() if key not in found]
+    if missing:
+        thumbnails.prefetch(missing)
+        rendered = {
+            key: render_to_string(template, {'post': post})
+            for key, post in keys.items() if key not in found
+        }
+        cache.set_many(rendered, caching.page_timeout())
+        found.update(rendered)
+    for key, post in keys.items():
+        post.card = mark_safe(found[key])
@@ -0,0 +1,111 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+
+from .models import Comment, Counter, Follow, Post
+
+ALL_POSTS = 'all_posts'
+AUTHOR_POSTS = 'author_posts'
+GROUP_POSTS = 'group_posts'
+POST_COMMENTS = 'post_comments'
+FOLLOWERS = 'followers'
+FOLLOWING = 'following'
+
+
+def change(name, object_id, delta):
+    counter = Counter.objects.filter(name=name, object_id=object_id)
+    if counter.update(value=F('value') + delta):
+        return
+    try:
+        with transaction.atomic():
+            Counter.objects.create(
+                name=name, object_id=object_id, value=delta
+            )
+    except IntegrityError:
+        counter.update(value=F('value') + delta)
+
+
+def get(name, object_id):
+    return Counter.objects.filter(
+        name=name, object_id=object_id
+    ).values_list('value', flat=True).first() or 0
+
+
+def total(name, object_ids):
+    return Counter.objects.filter(
+        name=name, object_id__in=object_ids
+    ).aggregate(total=Sum('value'))['total'] or 0
+
+
+def sources(post_model, comment_model, follow_model):
+    """Счётчики по объектам: имя, выборка и поле объекта."""
+    return (
+        (AUTHOR_POSTS, post_model.objects.all(), 'author'),
+        (GROUP_POSTS, post_model.objects.exclude(group=None), 'group'),
+        (POST_COMMENTS, comment_model.objects.all(), 'post'),
+        (FOLLOWERS, follow_model.objects.all(), 'author'),
+        (FOLLOWING, follow_model.objects.all(), 'user'),
+    )
+
+
+def insert_missing(counter_model, name, counted):
+    """INSERT ... SELECT счётчиков ``name`` из выборки (объект, число)."""
+    select, params = counted.query.sql_with_params()
+    ops = connection.ops
+    columns = ', '.join(
+        ops.quote_name(counter_model._meta.get_field(field).column)
+        for field in ('name', 'object_id', 'value')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {ops.quote_name(counter_model._meta.db_table)} '
+            f'({columns}) SELECT %s, counted.* FROM ({select}) counted',
+            (name, *params),
+        )
+        return cursor.rowcount
+
+
+def reconcile_source(counter_model, name, queryset, field):
+    """Исправляет счётчики ``name`` тремя запросами к базе, не читая
+    их в память: удаляет лишние, обновляет неверные, добавляет
+    недостающие. Возвращает число исправленных.
+    """
+    stored = counter_model.objects.filter(name=name)
+    orphans = stored.exclude(object_id__in=queryset.values(field))
+    fixed = orphans.exclude(value=0).count()
+    orphans.delete()
+    actual = Subquery(
+        queryset.filter(**{field: OuterRef('object_id')}).order_by().values(
+            field
+        ).annotate(value=Count('id')).values('value')
+    )
+    fixed += stored.exclude(value=actual).update(value=actual)
+    counted = queryset.exclude(
+        **{f'{field}__in': stored.values('object_id')}
+    ).order_by().values(field).annotate(value=Count('id')).values_list(
+        field, 'value'
+    )
+    return fixed + insert_missing(counter_model, name, counted)
+
+
+def reconcile(counter_model=Counter, post_model=Post,
+              comment_model=Comment, follow_model=Follow):
+    """Сверяет счётчики с данными и исправляет расхождения.
+
+    Возвращает число исправленных счётчиков.
+    """
+    with transaction.atomic():
+        fixed = 0
+        posts = post_model.objects.count()
+        counter, created = counter_model.objects.get_or_create(
+            name=ALL_POSTS, object_id=0, defaults={'value': posts}
+        )
+        if created:
+            fixed += bool(posts)
+        elif counter.value != posts:
+            counter_model.objects.filter(pk=counter.pk).update(value=posts)
+            fixed += 1
+        for name, queryset, field in sources(
+            post_model, comment_model, follow_model
+        ):
+            fixed += reconcile_source(counter_model, name, queryset, field)
+    return fixed
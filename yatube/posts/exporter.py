@@ -0,0 +1,114 @@
+import json
+
+from django.db.models import Q
+
+from .models import Comment, Follow, Post
+
+KINDS = ('post', 'comment', 'follow')
+BATCH_SIZE = 2000
+
+
+def post_record(row):
+    return {
+        'type': 'post',
+        'id': row['id'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'text': row['text'],
+        'pub_date': row['pub_date'].isoformat(),
+        'image': row['image'] or None,
+    }
+
+
+def comment_record(row):
+    return {
+        'type': 'comment',
+        'id': row['id'],
+        'post': row['post_id'],
+        'author': row['author__username'],
+        'text': row['text'],
+        'created': row['created'].isoformat(),
+    }
+
+
+def follow_record(row):
+    return {
+        'type': 'follow',
+        'user': row['user__username'],
+        'author': row['author__username'],
+    }
+
+
+RECORDS = {
+    'post': post_record,
+    'comment': comment_record,
+    'follow': follow_record,
+}
+
+
+def querysets(author=None, group=None, since=None, until=None):
+    """Выборки ``values()`` для каждого вида записей с учётом фильтров.
+
+    Комментарии выгружаются к выбранным постам, а при фильтре по
+    автору — ещё и написанные им к чужим постам. Подписки не зависят
+    от группы и дат, поэтому при этих фильтрах не выгружаются.
+    """
+    posts = Q()
+    comments = Q()
+    follows = Q()
+    if author is not None:
+        posts &= Q(author__username=author)
+        comments &= Q(post__author__username=author) | Q(
+            author__username=author
+        )
+        follows &= Q(user__username=author)
+    if group is not None:
+        posts &= Q(group__slug=group)
+        comments &= Q(post__group__slug=group)
+    if since is not None:
+        posts &= Q(pub_date__gte=since)
+        comments &= Q(post__pub_date__gte=since)
+    if until is not None:
+        posts &= Q(pub_date__lt=until)
+        comments &= Q(post__pub_date__lt=until)
+    result = {
+        'post': Post.objects.filter(posts).values(
+            'id', 'author__username', 'group__slug', 'text', 'pub_date',
+            'image',
+        ),
+        'comment': Comment.objects.filter(comments).values(
+            'id', 'post_id', 'author__username', 'text', 'created',
+        ),
+    }
+    if group is None and since is None and until is None:
+        result['follow'] = Follow.objects.filter(follows).values(
+            'id', 'user__username', 'author__username',
+        )
+    return result
+
+
+def batches(queryset, after=0, size=BATCH_SIZE):
+    """Строки пачками по возрастанию id.
+
+    Каждая пачка — отдельный запрос по ключу ``id > последнего``, так
+    что ни память, ни стоимость запроса не растут к концу выгрузки.
+    """
+    while True:
+        batch = list(queryset.filter(id__gt=after).order_by('id')[
+            :size
+        ].iterator(chunk_size=size))
+        if not batch:
+            return
+        yield batch
+        after = batch[-1]['id']
+
+
+def dump(kind, row):
+    return json.dumps(RECORDS[kind](row), ensure_ascii=False) + '\n'
+
+
+def stream(size=BATCH_SIZE, **filters):
+    """Строки JSONL всех видов записей по очереди."""
+    for kind, queryset in querysets(**filters).items():
+        for batch in batches(queryset, size=size):
+            yield ''.join(dump(kind, row) for row in batch)
@@ -0,0 +1,153 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from . import counters
+from .models import Counter, FeedItem, Follow, Post
+from .paginators import CursorPaginator
+
+INBOX_ORDERING = ('-pub_date', '-post_id')
+BATCH_SIZE = 500
+
+
+def is_celebrity(author_id):
+    followers = counters.get(counters.FOLLOWERS, author_id)
+    return followers > settings.FEED_FANOUT_LIMIT
+
+
+def celebrity_ids(user):
+    """Популярные авторы из подписок пользователя: их читаем напрямую."""
+    followed = Follow.objects.filter(user=user).values('author')
+    return list(Counter.objects.filter(
+        name=counters.FOLLOWERS,
+        object_id__in=followed,
+        value__gt=settings.FEED_FANOUT_LIMIT,
+    ).values_list('object_id', flat=True))
+
+
+def fan_out(post):
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, post=post, author_id=post.author_id,
+                     pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def follow_added(follow):
+    """Раскладывает посты автора во входящие нового подписчика.
+
+    Автор, ставший популярным этой подпиской, пропадает из входящих
+    всех подписчиков: его посты подмешиваются при чтении.
+    """
+    followers = counters.get(counters.FOLLOWERS, follow.author_id)
+    limit = settings.FEED_FANOUT_LIMIT
+    if followers > limit:
+        if followers - 1 <= limit:
+            FeedItem.objects.filter(author_id=follow.author_id).delete()
+        return
+    insert_inbox(Post.objects.filter(
+        author__following=follow
+    ).values_list(
+        'author__following__user_id', 'id', 'author_id', 'pub_date'
+    ).order_by())
+
+
+def follow_removed(follow):
+    """Убирает автора из входящих бывшего подписчика.
+
+    Если автор опустился до порога, его посты раскладываются во
+    входящие всех подписчиков: вышедшие без рассылки иначе пропали бы
+    из лент.
+    """
+    FeedItem.objects.filter(
+        user_id=follow.user_id,
+        author_id=follow.author_id,
+    ).delete()
+    followers = counters.get(counters.FOLLOWERS, follow.author_id)
+    if followers == settings.FEED_FANOUT_LIMIT:
+        insert_inbox(Post.objects.filter(
+            author_id=follow.author_id, author__following__isnull=False
+        ).values_list(
+            'author__following__user_id', 'id', 'author_id', 'pub_date'
+        ).order_by())
+
+
+def backfill_imported(first_post_id, first_follow_id):
+    """Входящие для постов и подписок, вставленных в обход сигналов.
+
+    Пары «подписчик — пост», где новый пост или подписка, переносятся
+    одним INSERT ... SELECT, не поднимая строки в Python.
+    """
+    celebrities = Counter.objects.filter(
+        name=counters.FOLLOWERS, value__gt=settings.FEED_FANOUT_LIMIT
+    ).values('object_id')
+    insert_inbox(Post.objects.filter(
+        Q(id__gte=first_post_id)
+        | Q(author__following__id__gte=first_follow_id),
+        author__following__isnull=False,
+    ).exclude(author__in=celebrities).values_list(
+        'author__following__user_id', 'id', 'author_id', 'pub_date'
+    ).order_by())
+
+
+def insert_inbox(rows):
+    """INSERT ... SELECT во входящие; ``rows`` — values_list полей
+    подписчик, пост, автор, дата.
+    """
+    select, params = rows.query.sql_with_params()
+    ops = connection.ops
+    columns = ', '.join(
+        ops.quote_name(FeedItem._meta.get_field(name).column)
+        for name in ('user', 'post', 'author', 'pub_date')
+    )
+    suffix = ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{ops.quote_name(FeedItem._meta.db_table)} ({columns}) '
+            f'{select} {suffix}',
+            params,
+        )
+
+
+class FeedPaginator(CursorPaginator):
+    """Лента подписок: страница собирается из входящих записей пользователя
+    и, если он подписан на популярных авторов, из их постов.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(
+            Post.objects.select_related('author', 'group'), per_page
+        )
+        self.user = user
+
+    def inbox(self):
+        return FeedItem.objects.filter(user=self.user).select_related(
+            'post__author', 'post__group'
+        )
+
+    def inbox_posts(self, items):
+        return [item.post for item in items]
+
+    def fetch(self, key, backwards):
+        posts = self.inbox_posts(self.fetch_queryset(
+            self.inbox(), INBOX_ORDERING, key, backwards
+        ))
+        celebrities = celebrity_ids(self.user)
+        if not celebrities:
+            return posts
+        posts += self.fetch_queryset(
+            self.object_list.filter(author__in=celebrities),
+            self.ordering, key, backwards
+        )
+        posts = {self.cursor_values(post): post for post in posts}.values()
+        return sorted(posts, key=self.cursor_values, reverse=not backwards)
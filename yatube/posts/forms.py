@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 from django.utils.safestring import mark_safe
 
+from . import images
 from .models import Post, Group, Comment
 
 
@@ -21,6 +23,12 @@ class PostForm(forms.ModelForm):
         help_texts = {'text': 'My help_text',
                       'group': 'My help_text for group'}
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            image = images.normalize(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
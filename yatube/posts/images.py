@@ -0,0 +1,133 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image, ImageCms, features
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp'}
+CONTENT_TYPES = {'JPEG': 'image/jpeg', 'WEBP': 'image/webp'}
+
+
+def save_options(image_format):
+    options = {'quality': settings.POST_IMAGE_QUALITY}
+    if image_format == 'JPEG':
+        options.update(optimize=True, progressive=True)
+    elif image_format == 'WEBP':
+        options.update(method=6)
+    return options
+
+
+# Режимы, цвета которых LittleCMS переводит в sRGB, и режим результата.
+CMS_MODES = {'RGB': 'RGB', 'RGBA': 'RGBA', 'CMYK': 'RGB', 'L': 'RGB'}
+
+
+def to_srgb(image, icc_profile):
+    """Переводит цвета из встроенного ICC-профиля в sRGB.
+
+    Возвращает изображение и профиль, который надо записать в результат:
+    если перевести цвета нельзя (нет LittleCMS, профиль не читается),
+    профиль RGB остаётся в файле, а профиль другого пространства цветов
+    к результату в RGB не подходит и отбрасывается.
+    """
+    if not icc_profile:
+        return image, None
+    if features.check('littlecms2') and image.mode in CMS_MODES:
+        try:
+            return ImageCms.profileToProfile(
+                image,
+                ImageCms.ImageCmsProfile(BytesIO(icc_profile)),
+                ImageCms.createProfile('sRGB'),
+                outputMode=CMS_MODES[image.mode],
+            ), None
+        except ImageCms.PyCMSError:
+            pass
+    if image.mode in ('RGB', 'RGBA'):
+        return image, icc_profile
+    return image, None
+
+
+# Поворот по тегу EXIF Orientation (0x0112), как в ImageOps.exif_transpose.
+ORIENTATION = 0x0112
+TRANSPOSE = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+
+def flatten(image, image_format):
+    if image_format == 'WEBP' and image.mode in ('RGBA', 'LA', 'P'):
+        return image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def normalize(upload):
+    """Уменьшает, поворачивает по EXIF и пережимает загруженное изображение.
+
+    Возвращает новый файл или исходный, если обработка его не улучшит
+    или Pillow не справился с файлом.
+    """
+    upload.seek(0)
+    try:
+        result = reencode(upload)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', upload.name)
+        result = None
+    upload.seek(0)
+    return result or upload
+
+
+def reencode(upload):
+    """Новый файл изображения или None, если он не нужен."""
+    image_format = settings.POST_IMAGE_FORMAT
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    with Image.open(upload) as image:
+        if getattr(image, 'is_animated', False):
+            return None
+        oversized = max(image.size) > max_side
+        # EXIF читается до thumbnail(): после загрузки пикселей некоторые
+        # форматы (TIFF) закрывают файл, и getexif() уже не прочитать.
+        exif = image.getexif()
+        has_metadata = bool(image.info.get('exif')) or bool(exif)
+        transpose = TRANSPOSE.get(exif.get(ORIENTATION))
+        icc_profile = image.info.get('icc_profile')
+        # Уменьшение до поворота: рамка квадратная, а thumbnail у JPEG
+        # через draft() декодирует сразу в меньшем масштабе, не
+        # разворачивая в памяти всё исходное изображение.
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if transpose is not None:
+            image = image.transpose(transpose)
+        image, icc_profile = to_srgb(image, icc_profile)
+        image = flatten(image, image_format)
+        name = os.path.splitext(os.path.basename(upload.name))[0]
+        result = TemporaryUploadedFile(
+            name + EXTENSIONS[image_format],
+            CONTENT_TYPES[image_format], 0, None,
+        )
+        options = save_options(image_format)
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        image.save(result, image_format, **options)
+    result.size = result.tell()
+    result.seek(0)
+    if not oversized and not has_metadata and result.size >= upload.size:
+        result.close()
+        return None
+    logger.info(
+        'Изображение %s: %s → %s байт, сэкономлено %s',
+        upload.name, upload.size, result.size, upload.size - result.size,
+    )
+    return result
@@ -0,0 +1,267 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, counters, feed
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+KINDS = ('post', 'comment', 'follow')
+BATCH_SIZE = 5000
+POST_FIELDS = (
+    'id', 'text', 'author', 'group', 'pub_date', 'updated_at', 'image',
+    'thumbnails_failed',
+)
+COMMENT_FIELDS = ('post', 'author', 'text', 'created')
+FOLLOW_FIELDS = ('user', 'author')
+
+
+class RecordError(ValueError):
+    """Запись файла импорта не удалось разобрать."""
+
+
+def read_records(stream, file_format):
+    """Построчно читает пары (номер строки, запись), не загружая файл
+    в память. В CSV пустые ячейки означают отсутствие значения.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {
+                key: value or None for key, value in row.items()
+            }
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as error:
+            raise RecordError(f'строка {number}: некорректный JSON ({error})')
+
+
+def insert_rows(model, fields, rows, ignore_conflicts=False):
+    """Вставляет строки одним executemany.
+
+    Подготовка объектов моделей в bulk_create на миллионах строк
+    обходится дороже самой вставки, поэтому значения передаются в базу
+    как есть.
+    """
+    ops = connection.ops
+    columns = ', '.join(
+        ops.quote_name(model._meta.get_field(name).column) for name in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=ignore_conflicts)} '
+        f'{ops.quote_name(model._meta.db_table)} ({columns}) '
+        f'VALUES ({placeholders}) '
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=ignore_conflicts)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def require(record, name):
+    value = record.get(name)
+    if value in (None, ''):
+        raise RecordError(f'нет поля {name}')
+    return value
+
+
+def parse_date(value):
+    if value in (None, ''):
+        return timezone.now()
+    date = parse_datetime(str(value))
+    if date is None:
+        raise RecordError(f'некорректная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def db_date(value):
+    """Дата из файла в виде, пригодном для прямой вставки в базу."""
+    return connection.ops.adapt_datetimefield_value(parse_date(value))
+
+
+class Importer:
+    """Импорт записей пачками в обход сигналов моделей.
+
+    Авторы и группы ищутся по словарям в памяти, недостающие создаются
+    пачкой. Идентификаторы постов назначаются заранее, чтобы
+    комментарии могли ссылаться на посты из того же файла, поэтому
+    импорт не должен идти одновременно с публикацией через сайт.
+    Счётчики, входящие ленты и кэш страниц приводятся в порядок
+    в ``finish`` (или в ``repair``, если импорт прерван). Миниатюры
+    картинок создаёт отдельно ``thumbnails_command``.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.users = dict(
+            User.objects.values_list('username', 'pk').iterator()
+        )
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.first_post_id = (
+            Post.objects.aggregate(last=Max('id'))['last'] or 0
+        ) + 1
+        self.first_follow_id = (
+            Follow.objects.aggregate(last=Max('id'))['last'] or 0
+        ) + 1
+        self.next_post_id = self.first_post_id
+        self.post_ids = {}
+        self.pending = {kind: [] for kind in KINDS}
+        self.created = dict.fromkeys(KINDS, 0)
+        self.skipped = 0
+        self.images = 0
+        self.scopes = {'all'}
+
+    @property
+    def total(self):
+        return sum(self.created.values())
+
+    @property
+    def thumbnails_command(self):
+        """Команда, создающая миниатюры картинок импортированных постов;
+        None, если картинок не было.
+        """
+        if not self.images:
+            return None
+        return (
+            'python manage.py generate_thumbnails '
+            f'--from-id {self.first_post_id}'
+        )
+
+    def add(self, record):
+        kind = record.get('type') if isinstance(record, dict) else None
+        if kind not in KINDS:
+            raise RecordError(f'неизвестный тип записи {kind!r}')
+        item = getattr(self, f'parse_{kind}')(record)
+        if item is None:
+            self.skipped += 1
+            return
+        self.pending[kind].append(item)
+        if sum(map(len, self.pending.values())) >= self.batch_size:
+            self.flush()
+
+    def parse_post(self, record):
+        pk = self.next_post_id
+        self.next_post_id += 1
+        if record.get('id') is not None:
+            self.post_ids[str(record['id'])] = pk
+        pub_date = db_date(record.get('pub_date'))
+        return {
+            'id': pk,
+            'author': require(record, 'author'),
+            'group': record.get('group'),
+            'text': require(record, 'text'),
+            'pub_date': pub_date,
+            'image': record.get('image') or '',
+        }
+
+    def parse_comment(self, record):
+        post_id = self.post_ids.get(str(require(record, 'post')))
+        if post_id is None:
+            return None
+        return {
+            'post_id': post_id,
+            'author': require(record, 'author'),
+            'text': require(record, 'text'),
+            'created': db_date(record.get('created')),
+        }
+
+    def parse_follow(self, record):
+        user = require(record, 'user')
+        author = require(record, 'author')
+        if user == author:
+            return None
+        return {'user': user, 'author': author}
+
+    def resolve_users(self):
+        usernames = {item['author'] for item in self.pending['post']}
+        usernames.update(item['author'] for item in self.pending['comment'])
+        for item in self.pending['follow']:
+            usernames.update((item['user'], item['author']))
+        missing = usernames.difference(self.users)
+        if not missing:
+            return
+        password = make_password(None)
+        User.objects.bulk_create(
+            (
+                User(username=name, password=password)
+                for name in sorted(missing)
+            ),
+            ignore_conflicts=True,
+        )
+        self.users.update(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'pk'))
+
+    def resolve_groups(self):
+        missing = {
+            item['group'] for item in self.pending['post'] if item['group']
+        }.difference(self.groups)
+        if not missing:
+            return
+        Group.objects.bulk_create(
+            (
+                Group(title=slug, slug=slug, description='')
+                for slug in sorted(missing)
+            ),
+            ignore_conflicts=True,
+        )
+        self.groups.update(Group.objects.filter(
+            slug__in=missing
+        ).values_list('slug', 'pk'))
+
+    def flush(self):
+        with transaction.atomic():
+            self.resolve_users()
+            self.resolve_groups()
+            insert_rows(Post, POST_FIELDS, (
+                (item['id'], item['text'], self.users[item['author']],
+                 self.groups.get(item['group']), item['pub_date'],
+                 item['pub_date'], item['image'], False)
+                for item in self.pending['post']
+            ))
+            insert_rows(Comment, COMMENT_FIELDS, (
+                (item['post_id'], self.users[item['author']], item['text'],
+                 item['created'])
+                for item in self.pending['comment']
+            ))
+            insert_rows(Follow, FOLLOW_FIELDS, (
+                (self.users[item['user']], self.users[item['author']])
+                for item in self.pending['follow']
+            ), ignore_conflicts=True)
+        for item in self.pending['post']:
+            self.images += bool(item['image'])
+            self.scopes.add(f'author:{item["author"]}')
+            if item['group']:
+                self.scopes.add(f'group:{item["group"]}')
+        self.scopes.update(
+            f'author:{item["author"]}' for item in self.pending['follow']
+        )
+        for kind, items in self.pending.items():
+            self.created[kind] += len(items)
+            items.clear()
+
+    def finish(self):
+        self.flush()
+        self.repair()
+
+    def repair(self):
+        """Приводит в порядок счётчики, входящие ленты и кэш страниц для
+        уже вставленных пачек; нужен и после прерванного импорта.
+        """
+        counters.reconcile()
+        feed.backfill_imported(self.first_post_id, self.first_follow_id)
+        caching.bump(*self.scopes)
@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts import exporter
+
+
+def parse_moment(value):
+    """Дата или дата со временем из аргумента командной строки."""
+    moment = parse_datetime(value)
+    if moment is None and parse_date(value) is not None:
+        moment = parse_datetime(f'{value}T00:00:00')
+    if moment is None:
+        raise CommandError(f'Некорректная дата: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def save_checkpoint(path, state):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as stream:
+        json.dump(state, stream)
+    os.replace(temporary, path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, комментарии и подписки в JSONL, который '
+        'понимает import_yatube. Файл с расширением .gz сжимается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки.')
+        parser.add_argument('--author', help='Имя пользователя.')
+        parser.add_argument('--group', help='Адрес (slug) группы.')
+        parser.add_argument(
+            '--since', help='Посты, опубликованные начиная с этой даты.',
+        )
+        parser.add_argument(
+            '--until', help='Посты, опубликованные до этой даты.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=exporter.BATCH_SIZE,
+            help='Сколько строк читать одним запросом.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл состояния: прерванная выгрузка продолжится с него.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        checkpoint = options['checkpoint']
+        filters = {
+            name: options[name]
+            for name in ('author', 'group', 'since', 'until')
+        }
+        state = {'filters': filters, 'kind': exporter.KINDS[0],
+                 'after': 0, 'offset': 0}
+        resume = checkpoint is not None and os.path.exists(checkpoint)
+        if resume:
+            with open(checkpoint) as stream:
+                state = json.load(stream)
+            if state['filters'] != filters:
+                raise CommandError(
+                    'Фильтры не совпадают с прерванной выгрузкой.'
+                )
+        querysets = exporter.querysets(
+            author=filters['author'],
+            group=filters['group'],
+            since=filters['since'] and parse_moment(filters['since']),
+            until=filters['until'] and parse_moment(filters['until']),
+        )
+        compress = path.endswith('.gz')
+        written = 0
+        with open(path, 'r+b' if resume else 'wb') as output:
+            # Всё, что записано после последней контрольной точки,
+            # будет выгружено заново.
+            output.truncate(state['offset'])
+            output.seek(state['offset'])
+            start = exporter.KINDS.index(state['kind'])
+            for kind in exporter.KINDS[start:]:
+                if kind not in querysets:
+                    continue
+                after = state['after'] if kind == state['kind'] else 0
+                for batch in exporter.batches(
+                    querysets[kind], after, options['batch_size']
+                ):
+                    data = ''.join(
+                        exporter.dump(kind, row) for row in batch
+                    ).encode()
+                    # Каждая пачка — отдельный член gzip: склеенные члены
+                    # читаются как один файл, а обрезка по контрольной
+                    # точке не портит сжатый поток.
+                    output.write(gzip.compress(data) if compress else data)
+                    output.flush()
+                    written += len(batch)
+                    if checkpoint is not None:
+                        state.update(
+                            kind=kind, after=batch[-1]['id'],
+                            offset=output.tell(),
+                        )
+                        save_checkpoint(checkpoint, state)
+        if checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(f'Выгружено записей: {written}')
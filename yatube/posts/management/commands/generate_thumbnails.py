@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для уже загруженных изображений постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.THUMBNAIL_WORKERS,
+            help='Число потоков; 0 — обрабатывать в текущем потоке.',
+        )
+        parser.add_argument(
+            '--from-id', type=int,
+            help='Только посты с этим id и новее, например после импорта.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None)
+        if options['from_id'] is not None:
+            posts = posts.filter(pk__gte=options['from_id'])
+        post_ids = list(posts.values_list('pk', flat=True))
+        if options['workers']:
+            with ThreadPoolExecutor(options['workers']) as pool:
+                list(pool.map(thumbnails.generate_in_worker, post_ids))
+        else:
+            for post_id in post_ids:
+                thumbnails.generate(post_id)
+        self.stdout.write(f'Обработано постов: {len(post_ids)}')
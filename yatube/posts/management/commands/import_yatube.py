@@ -0,0 +1,88 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+from posts.importer import (
+    BATCH_SIZE, FORMATS, Importer, RecordError, read_records,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты, комментарии и подписки из JSONL или CSV. '
+        'Каждая запись содержит поле type: post (id, author, group, text, '
+        'pub_date, image), comment (post — id поста из файла, author, '
+        'text, created) или follow (user, author).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с записями; «-» — стандартный ввод.',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько записей вставлять в одной транзакции.',
+        )
+
+    def read(self, importer, stream, file_format, options):
+        for line, record in read_records(stream, file_format):
+            try:
+                importer.add(record)
+            except RecordError as error:
+                raise RecordError(f'строка {line}: {error}')
+            if options['verbosity'] > 1 and (
+                line % importer.batch_size == 0
+            ):
+                self.stdout.write(f'Прочитано строк: {line}')
+
+    def thumbnails_hint(self, importer):
+        if importer.thumbnails_command:
+            self.stdout.write(
+                f'Постов с картинкой: {importer.images}, миниатюры '
+                f'создаст {importer.thumbnails_command}'
+            )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        started = time.monotonic()
+        stream = sys.stdin if path == '-' else open(
+            path, encoding='utf-8', newline=''
+        )
+        importer = Importer(options['batch_size'])
+        try:
+            with search.deferred_index():
+                try:
+                    self.read(importer, stream, file_format, options)
+                    importer.flush()
+                finally:
+                    # Пачки, вставленные до ошибки, остаются в базе.
+                    importer.repair()
+        except RecordError as error:
+            # Вставленным до ошибки постам миниатюры тоже нужны.
+            self.thumbnails_hint(importer)
+            raise CommandError(f'Импорт прерван, {error}.')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.monotonic() - started
+        created = importer.created
+        self.stdout.write(
+            f'Постов: {created["post"]}, комментариев: {created["comment"]}, '
+            f'подписок: {created["follow"]}, пропущено: {importer.skipped}'
+        )
+        self.stdout.write(
+            f'Импортировано записей: {importer.total} за {elapsed:.1f} с '
+            f'({importer.total / max(elapsed, 1e-6):.0f} в секунду)'
+        )
+        self.thumbnails_hint(importer)
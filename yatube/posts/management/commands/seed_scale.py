@@ -0,0 +1,90 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from posts import search, seeding
+from posts.importer import BATCH_SIZE, Importer
+
+COUNTS = {
+    'users': 1000,
+    'groups': 20,
+    'posts': 10000,
+    'comments': 30000,
+    'follows': 20000,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу сгенерированными пользователями, группами, '
+        'постами, комментариями и подписками для проверки под нагрузкой. '
+        'Одинаковые параметры и --seed дают одинаковые данные. Миниатюры '
+        'картинок создаёт generate_thumbnails.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in COUNTS.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать (по умолчанию {default}).',
+            )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить посты.',
+        )
+        parser.add_argument(
+            '--end', default=seeding.END,
+            help=f'Дата последнего поста (по умолчанию {seeding.END}).',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0,
+            help='Доля постов с картинкой, от 0 до 1.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if any(options[name] < 0 for name in COUNTS):
+            raise CommandError('Количества не могут быть отрицательными.')
+        if options['posts'] and not options['users']:
+            raise CommandError('Для постов нужен хотя бы один пользователь.')
+        day = parse_date(options['end'])
+        if day is None:
+            raise CommandError(f'Некорректная дата: {options["end"]}')
+        end = timezone.make_aware(
+            datetime.datetime(day.year, day.month, day.day)
+        )
+        rng = random.Random(options['seed'])
+        started = time.monotonic()
+        seeding.create_groups(options['groups'])
+        images = ()
+        if options['images'] > 0:
+            images = seeding.create_images(random.Random(options['seed']))
+        importer = Importer(options['batch_size'])
+        with search.deferred_index():
+            for record in seeding.records(
+                rng, end, days=options['days'], images=images,
+                image_share=options['images'],
+                **{name: options[name] for name in COUNTS},
+            ):
+                importer.add(record)
+            importer.finish()
+        elapsed = time.monotonic() - started
+        created = importer.created
+        self.stdout.write(
+            f'Постов: {created["post"]}, комментариев: {created["comment"]}, '
+            f'подписок: {created["follow"]}, пропущено: {importer.skipped}'
+        )
+        self.stdout.write(
+            f'Создано записей: {importer.total} за {elapsed:.1f} с '
+            f'({importer.total / max(elapsed, 1e-6):.0f} в секунду)'
+        )
+        if importer.thumbnails_command:
+            self.stdout.write(
+                f'Постов с картинкой: {importer.images}, миниатюры '
+                f'создаст {importer.thumbnails_command}'
+            )
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:25
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    Counter, Post, Comment, Follow = (
+        apps.get_model('posts', name)
+        for name in ('Counter', 'Post', 'Comment', 'Follow')
+    )
+    Counter.objects.create(
+        name='all_posts', object_id=0, value=Post.objects.count()
+    )
+    sources = (
+        ('author_posts', Post.objects.all(), 'author'),
+        ('group_posts', Post.objects.exclude(group=None), 'group'),
+        ('post_comments', Comment.objects.all(), 'post'),
+        ('followers', Follow.objects.all(), 'author'),
+        ('following', Follow.objects.all(), 'user'),
+    )
+    for name, queryset, field in sources:
+        rows = queryset.values(field).order_by().annotate(
+            value=models.Count('id')
+        ).values_list(field, 'value')
+        Counter.objects.bulk_create(
+            (
+                Counter(name=name, object_id=object_id, value=value)
+                for object_id, value in rows.iterator()
+            ),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_feeditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32)),
+                ('object_id', models.PositiveIntegerField()),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='counter',
+            constraint=models.UniqueConstraint(fields=('name', 'object_id'), name='one_counter'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_feed(apps, schema_editor):
+    """Входящие ленты для подписок, появившихся до 0007: посты авторов,
+    кроме популярных, которых лента подписок читает напрямую.
+    """
+    FeedItem, Follow, Post = (
+        apps.get_model('posts', name)
+        for name in ('FeedItem', 'Follow', 'Post')
+    )
+    connection = schema_editor.connection
+    ops = connection.ops
+
+    def table(model):
+        return ops.quote_name(model._meta.db_table)
+
+    def column(model, name):
+        return ops.quote_name(model._meta.get_field(name).column)
+
+    columns = ', '.join(
+        column(FeedItem, name)
+        for name in ('user', 'post', 'author', 'pub_date')
+    )
+    follow_author = column(Follow, 'author')
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} {table(FeedItem)} '
+        f'({columns}) '
+        f'SELECT f.{column(Follow, "user")}, p.{column(Post, "id")}, '
+        f'p.{column(Post, "author")}, p.{column(Post, "pub_date")} '
+        f'FROM {table(Follow)} f JOIN {table(Post)} p '
+        f'ON p.{column(Post, "author")} = f.{follow_author} '
+        f'WHERE f.{follow_author} NOT IN ('
+        f'SELECT {follow_author} FROM {table(Follow)} '
+        f'GROUP BY {follow_author} HAVING COUNT(*) > %s) '
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [settings.FEED_FANOUT_LIMIT])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_thumbnails_failed'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_feed, migrations.RunPython.noop),
+    ]
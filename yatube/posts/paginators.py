@@ -0,0 +1,114 @@
+import base64
+import json
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+POST_ORDERING = ('-pub_date', '-id')
+
+
+def encode_cursor(values):
+    date, pk = values
+    raw = json.dumps([date.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (дата, id) из курсора или None, если курсор испорчен."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        date, pk = json.loads(raw.decode())
+        date = parse_datetime(date)
+    except (ValueError, TypeError):
+        return None
+    if date is None or not isinstance(pk, int):
+        return None
+    return date, pk
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith('-') else '-' + field
+        for field in ordering
+    )
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (дата, id) без COUNT(*) и OFFSET.
+
+    Соседние страницы адресуются непрозрачными курсорами ``after`` и
+    ``before``, поэтому выборка любой страницы стоит одинаково.
+    """
+    keyset = True
+    # Параметры запроса, которые ссылки на соседние страницы сохраняют.
+    query_string = ''
+
+    def __init__(self, object_list, per_page, ordering=POST_ORDERING):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def encode_cursor(self, values):
+        return encode_cursor(values)
+
+    def decode_cursor(self, token):
+        return decode_cursor(token)
+
+    def get_cursor_page(self, after=None, before=None):
+        key = self.decode_cursor(after)
+        backwards = key is None and self.decode_cursor(before) is not None
+        if backwards:
+            key = self.decode_cursor(before)
+        objects = self.fetch(key, backwards)
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if backwards:
+            objects.reverse()
+            if not objects:
+                return self.get_cursor_page()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = key is not None, has_more
+        if objects and has_next:
+            self.next_cursor = self.encode_cursor(
+                self.cursor_values(objects[-1])
+            )
+        if objects and has_previous:
+            self.previous_cursor = self.encode_cursor(
+                self.cursor_values(objects[0])
+            )
+        number = 2 if has_previous else 1
+        self.num_pages = number + 1 if has_next else number
+        return Page(objects, number, self)
+
+    def fetch(self, key, backwards):
+        return self.fetch_queryset(
+            self.object_list, self.ordering, key, backwards
+        )
+
+    def fetch_queryset(self, queryset, ordering, key, backwards):
+        if backwards:
+            ordering = reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self.cursor_filter(ordering, key))
+        return list(queryset[:self.per_page + 1])
+
+    def cursor_filter(self, ordering, key):
+        first, second = (field.lstrip('-') for field in ordering)
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        date, pk = key
+        return (
+            Q(**{f'{first}__{lookup}': date})
+            | Q(**{first: date, f'{second}__{lookup}': pk})
+        )
+
+    def cursor_values(self, obj):
+        return tuple(
+            getattr(obj, field.lstrip('-').split('__')[-1])
+            for field in self.ordering
+        )
@@ -0,0 +1,175 @@
+import base64
+import json
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .paginators import CursorPaginator
+
+WORD = re.compile(r'\w+')
+# Границы совпадения в сниппете: управляющие символы не встречаются
+# в тексте поста и переживают экранирование HTML.
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+# Триггеры синхронизации индекса. SQLite пересоздаёт posts_post при
+# изменении схемы и теряет их, поэтому такие миграции создают их
+# заново своей копией этого SQL.
+TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+TRIGGER_NAMES = (
+    'posts_post_fts_insert', 'posts_post_fts_delete', 'posts_post_fts_update',
+)
+
+MATCH_SQL = """
+    SELECT posts_post_fts.rowid, bm25(posts_post_fts) AS score,
+           snippet(posts_post_fts, 0, %s, %s, '…', %s)
+    FROM posts_post_fts
+    WHERE posts_post_fts MATCH %s {condition}
+    ORDER BY score {direction}, posts_post_fts.rowid {direction}
+    LIMIT %s
+"""
+
+
+@contextmanager
+def deferred_index():
+    """Отключает триггеры индекса на время массовой вставки.
+
+    Построчное обновление индекса в разы медленнее одной перестройки,
+    поэтому после вставки индекс собирается заново целиком.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        for name in TRIGGER_NAMES:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')"
+            )
+            for statement in TRIGGERS:
+                cursor.execute(statement)
+
+
+def match_expression(query):
+    """Запрос пользователя в синтаксисе FTS5: все слова, каждое
+    как префикс. Возвращает пустую строку, если искать нечего.
+    """
+    words = WORD.findall(query or '')
+    return ' '.join('"{}"*'.format(word) for word in words)
+
+
+def filter_matching(queryset, query):
+    """Оставляет в выборке постов только подходящие под запрос.
+
+    Запрос без слов (например, из одних знаков препинания) не находит
+    ничего: пустой MATCH в FTS5 — синтаксическая ошибка.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    # RawSQL в pk__in оборачивается в лишние скобки, и SQLite считает
+    # ((SELECT ...)) скаляром, поэтому подзапрос задаём через extra().
+    return queryset.extra(
+        where=[
+            'posts_post.id IN (SELECT rowid FROM posts_post_fts '
+            'WHERE posts_post_fts MATCH %s)'
+        ],
+        params=[expression],
+    )
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchPaginator(CursorPaginator):
+    """Результаты поиска по релевантности (bm25, затем id)."""
+
+    def __init__(self, query, per_page):
+        super().__init__(
+            Post.objects.select_related('author', 'group'), per_page,
+            ordering=('score', 'id'),
+        )
+        self.expression = match_expression(query)
+        self.query_string = urlencode({'q': query}) if self.expression else ''
+
+    def encode_cursor(self, values):
+        raw = json.dumps(list(values)).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            score, pk = json.loads(raw.decode())
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(score, (int, float)) or not isinstance(pk, int):
+            return None
+        return score, pk
+
+    def fetch(self, key, backwards):
+        if not self.expression:
+            return []
+        params = [MARK_START, MARK_END, SNIPPET_TOKENS, self.expression]
+        condition = ''
+        if key is not None:
+            lookup = '<' if backwards else '>'
+            condition = (
+                f'AND (score {lookup} %s OR '
+                f'(score = %s AND posts_post_fts.rowid {lookup} %s))'
+            )
+            params += [key[0], key[0], key[1]]
+        params.append(self.per_page + 1)
+        sql = MATCH_SQL.format(
+            condition=condition, direction='DESC' if backwards else 'ASC'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        posts = self.object_list.in_bulk([pk for pk, _, _ in rows])
+        found = []
+        for pk, score, snippet in rows:
+            post = posts.get(pk)
+            if post is None:
+                continue
+            post.score = score
+            post.snippet = highlight(snippet)
+            found.append(post)
+        return found
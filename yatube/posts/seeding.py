@@ -0,0 +1,139 @@
+import io
+import itertools
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageDraw
+
+from .models import Group
+
+WORDS = (
+    'кот', 'собака', 'город', 'утро', 'вечер', 'дорога', 'книга', 'море',
+    'работа', 'друг', 'время', 'дом', 'погода', 'кофе', 'музыка', 'лес',
+    'поезд', 'письмо', 'река', 'окно', 'снег', 'лето', 'сад', 'рынок',
+    'театр', 'мост', 'ветер', 'история', 'звезда', 'песня', 'фото', 'чай',
+)
+# Доля постов без группы и показатели степенных распределений: чем
+# больше показатель, тем сильнее популярные авторы и группы отрываются
+# от остальных.
+NO_GROUP_SHARE = 0.3
+AUTHOR_EXPONENT = 1.1
+POPULARITY_EXPONENT = 1.0
+GROUP_EXPONENT = 1.2
+IMAGE_VARIANTS = 8
+# Дата последнего поста по умолчанию: данные не зависят от дня запуска.
+END = '2024-01-01'
+
+
+def power_law(size, exponent):
+    """Накопленные веса 1 / rank ** exponent для ``rng.choices``."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+def ranked(rng, names):
+    """Имена в случайном порядке: место в нём определяет популярность."""
+    names = list(names)
+    rng.shuffle(names)
+    return names
+
+
+def create_groups(count):
+    Group.objects.bulk_create(
+        (
+            Group(title=f'Группа {number}', slug=f'group-{number}',
+                  description=f'Сгенерированная группа {number}')
+            for number in range(count)
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def create_images(rng, count=IMAGE_VARIANTS):
+    """Несколько картинок с градиентом, общих для всех постов.
+
+    Имя файла составлено из цветов градиента: повторный запуск с тем же
+    зерном находит уже записанные файлы, а не создаёт копии под
+    случайными именами хранилища.
+    """
+    names = []
+    for number in range(count):
+        start = tuple(rng.randrange(256) for _ in range(3))
+        end = tuple(rng.randrange(256) for _ in range(3))
+        name = f'posts/seed-{bytes(start).hex()}-{bytes(end).hex()}.jpg'
+        names.append(name)
+        if default_storage.exists(name):
+            continue
+        image = Image.new('RGB', (1280, 720))
+        draw = ImageDraw.Draw(image)
+        for y in range(image.height):
+            share = y / image.height
+            draw.line((0, y, image.width, y), fill=tuple(
+                round(a + (b - a) * share) for a, b in zip(start, end)
+            ))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=80)
+        default_storage.save(name, ContentFile(buffer.getvalue()))
+    return names
+
+
+def text(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def records(rng, end, users, groups, posts, comments, follows, days=365,
+            images=(), image_share=0):
+    """Записи в формате import_yatube, одинаковые для одного ``rng``.
+
+    Посты равномерно заполняют ``days`` дней до ``end``. Число постов
+    у автора, подписчиков у автора, постов в группе и комментариев
+    у поста распределены по степенному закону.
+    """
+    usernames = [f'user{number}' for number in range(users)]
+    authors = ranked(rng, usernames)
+    author_weights = power_law(users, AUTHOR_EXPONENT)
+    slugs = ranked(rng, (f'group-{number}' for number in range(groups)))
+    group_weights = power_law(groups, GROUP_EXPONENT)
+    started = end - timedelta(days=days)
+    step = timedelta(days=days) / max(posts, 1)
+    for number in range(posts):
+        group = None
+        if slugs and rng.random() >= NO_GROUP_SHARE:
+            group = rng.choices(slugs, cum_weights=group_weights)[0]
+        yield {
+            'type': 'post',
+            'id': number,
+            'author': rng.choices(authors, cum_weights=author_weights)[0],
+            'group': group,
+            'text': text(rng, 5, 60),
+            'pub_date': (started + step * number).isoformat(),
+            'image': (
+                rng.choice(images)
+                if images and rng.random() < image_share else None
+            ),
+        }
+    # Свежие посты комментируют чаще: ранг 1 у последнего поста.
+    post_weights = power_law(posts, POPULARITY_EXPONENT)
+    for _ in range(comments if posts else 0):
+        post = posts - 1 - rng.choices(
+            range(posts), cum_weights=post_weights
+        )[0]
+        created = started + step * post + timedelta(
+            minutes=rng.randint(1, 600)
+        )
+        yield {
+            'type': 'comment',
+            'post': post,
+            'author': rng.choice(usernames),
+            'text': text(rng, 1, 20),
+            'created': min(created, end).isoformat(),
+        }
+    follow_weights = power_law(users, POPULARITY_EXPONENT)
+    for _ in range(follows if users > 1 else 0):
+        yield {
+            'type': 'follow',
+            'user': rng.choice(usernames),
+            'author': rng.choices(authors, cum_weights=follow_weights)[0],
+        }
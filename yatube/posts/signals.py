@@ -0,0 +1,198 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from . import caching, counters, feed
+from .models import Comment, Counter, Follow, Group, Post
+
+User = get_user_model()
+
+# Поля, которые видны на страницах лент: их изменение устаревает
+# закэшированные страницы.
+USER_DISPLAY_FIELDS = ('username', 'first_name', 'last_name')
+GROUP_DISPLAY_FIELDS = ('title', 'slug', 'description')
+# Поля группы в карточках постов (posts.cards).
+GROUP_CARD_FIELDS = ('title', 'slug')
+
+
+def count_post(post, delta):
+    counters.change(counters.ALL_POSTS, 0, delta)
+    counters.change(counters.AUTHOR_POSTS, post.author_id, delta)
+    if post.group_id is not None:
+        counters.change(counters.GROUP_POSTS, post.group_id, delta)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    instance.previous_group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        if created:
+            count_post(instance, 1)
+            feed.fan_out(instance)
+        elif instance.previous_group_id != instance.group_id:
+            if instance.previous_group_id is not None:
+                counters.change(
+                    counters.GROUP_POSTS, instance.previous_group_id, -1
+                )
+            if instance.group_id is not None:
+                counters.change(counters.GROUP_POSTS, instance.group_id, 1)
+    caching.invalidate_post(
+        instance, {instance.group_id, instance.previous_group_id}
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    with transaction.atomic():
+        count_post(instance, -1)
+        Counter.objects.filter(
+            name=counters.POST_COMMENTS, object_id=instance.pk
+        ).delete()
+    caching.invalidate_post(instance, {instance.group_id})
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change(counters.POST_COMMENTS, instance.post_id, 1)
+    caching.bump(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change(counters.POST_COMMENTS, instance.post_id, -1)
+    caching.bump(f'post:{instance.post_id}')
+
+
+def count_follow(follow, delta):
+    with transaction.atomic():
+        counters.change(counters.FOLLOWERS, follow.author_id, delta)
+        counters.change(counters.FOLLOWING, follow.user_id, delta)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        count_follow(instance, 1)
+        feed.follow_added(instance)
+        caching.bump(f'author:{instance.author.username}')
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    count_follow(instance, -1)
+    feed.follow_removed(instance)
+    caching.bump(f'author:{instance.author.username}')
+
+
+def previous_values(instance, fields, update_fields):
+    """Прежние значения ``fields`` или None, если они не меняются."""
+    if instance.pk is None or (
+        update_fields is not None and not set(update_fields) & set(fields)
+    ):
+        return None
+    return type(instance).objects.filter(
+        pk=instance.pk
+    ).values(*fields).first()
+
+
+def author_scopes(posts):
+    """Области страниц авторов ``posts``: их карточки видны в профиле."""
+    return [
+        f'author:{username}' for username in User.objects.filter(
+            posts__in=posts
+        ).distinct().values_list('username', flat=True)
+    ]
+
+
+def group_scopes(posts):
+    return [
+        f'group:{slug}' for slug in Group.objects.filter(
+            posts__in=posts
+        ).distinct().values_list('slug', flat=True)
+    ]
+
+
+def changed(instance, previous, fields):
+    return previous is not None and any(
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Вход обновляет только last_login: лишний запрос не нужен.
+    instance.previous_display = previous_values(
+        instance, USER_DISPLAY_FIELDS, update_fields
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, 'previous_display', None)
+    if raw or not changed(instance, previous, USER_DISPLAY_FIELDS):
+        return
+    # Карточки с прежним именем автора больше не находятся (posts.cards).
+    caching.bump(
+        f'card:author:{instance.pk}',
+        'all',
+        f'author:{previous["username"]}',
+        f'author:{instance.username}',
+        *group_scopes(Post.objects.filter(author=instance))
+    )
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance.previous_display = previous_values(
+        instance, GROUP_DISPLAY_FIELDS, update_fields
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, 'previous_display', None)
+    if raw or not changed(instance, previous, GROUP_DISPLAY_FIELDS):
+        return
+    scopes = ['all', f'group:{previous["slug"]}', f'group:{instance.slug}']
+    if changed(instance, previous, GROUP_CARD_FIELDS):
+        scopes.append(f'card:group:{instance.pk}')
+        scopes.extend(author_scopes(Post.objects.filter(group=instance)))
+    caching.bump(*scopes)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # Посты группы отвязываются одним UPDATE (SET_NULL) без сигналов:
+    # авторов, на чьих страницах была группа, находим до удаления.
+    instance.author_scopes = author_scopes(
+        Post.objects.filter(group=instance)
+    )
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    Counter.objects.filter(
+        name=counters.GROUP_POSTS, object_id=instance.pk
+    ).delete()
+    # Карточки постов без группы лишаются области card:group и получают
+    # новые ключи (posts.cards), страницы — новые поколения.
+    caching.bump(
+        'all',
+        f'group:{instance.slug}',
+        f'card:group:{instance.pk}',
+        *instance.author_scopes
+    )
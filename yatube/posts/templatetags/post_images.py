@@ -0,0 +1,37 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(post):
+    """Карточка изображения поста: ``<picture>`` с вариантами по ширине
+    и формату или заглушка, пока миниатюры создаются в фоне. Если
+    создать их не удалось, выводится исходное изображение.
+    """
+    if not post.image:
+        return {'image': None}
+    found = thumbnails.variants(post)
+    sources = []
+    for image_format in thumbnails.CARD_FORMATS:
+        widths = {}
+        for width in thumbnails.CARD_WIDTHS:
+            im = found.get((width, image_format))
+            if im is not None:
+                widths.setdefault(im.width, im.url)
+        if widths:
+            sources.append({
+                'type': thumbnails.MIME_TYPES[image_format],
+                'srcset': ', '.join(
+                    f'{url} {width}w' for width, url in sorted(widths.items())
+                ),
+            })
+    return {
+        'image': post.image,
+        'fallback': thumbnails.for_post(post),
+        'failed': post.thumbnails_failed,
+        'sources': sources,
+        'sizes': thumbnails.CARD_SIZES,
+    }
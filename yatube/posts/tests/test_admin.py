@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts import counters
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Список постов в админке: запросы не зависят от числа строк и групп.
+CHANGELIST_BUDGET = 7
+
+
+class PostAdminTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        groups = Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}', description='-')
+            for i in range(5)
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.admin, group=groups[i % 5])
+            for i in range(150)
+        )
+        counters.reconcile()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def test_changelist_query_budget(self):
+        with self.assertQueryBudget(CHANGELIST_BUDGET, 'changelist'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 150)
+
+    @override_settings(ADMIN_COUNT_LIMIT=100)
+    def test_filtered_count_is_capped(self):
+        response = self.client.get(self.url, {'q': 'Пост'})
+        self.assertEqual(response.context['cl'].result_count, 100)
+
+    def test_search_without_words(self):
+        response = self.client.get(self.url, {'q': '!!!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 0)
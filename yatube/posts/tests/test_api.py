@@ -0,0 +1,136 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts import counters
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import SharedCacheMixin
+
+User = get_user_model()
+
+
+class ApiTest(SharedCacheMixin, QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(15)
+        )
+        cls.post = Post.objects.order_by('id').first()
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ответ')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        counters.reconcile()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, name, args=(), client=None, **params):
+        response = (client or self.client).get(
+            reverse(f'api_v1:{name}', args=args), params
+        )
+        return response, json.loads(response.content)
+
+    def test_feeds_page_by_cursor(self):
+        feeds = [
+            ('posts', ()),
+            ('group_posts', (self.group.slug,)),
+            ('profile_posts', (self.author.username,)),
+        ]
+        for name, args in feeds:
+            with self.subTest(feed=name):
+                _, first = self.get(name, args)
+                self.assertEqual(len(first['results']), 10)
+                _, second = self.get(name, args, after=first['next'])
+                self.assertEqual(len(second['results']), 5)
+                self.assertIsNone(second['next'])
+                ids = [item['id'] for item in first['results']]
+                ids += [item['id'] for item in second['results']]
+                self.assertEqual(len(set(ids)), 15)
+                self.assertEqual(first['results'][0]['author'], 'author')
+
+    def test_field_selection(self):
+        _, data = self.get('posts', fields='id,text')
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        response, data = self.get('posts', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', data['detail'])
+
+    def test_post_and_comments(self):
+        _, data = self.get('post', (self.post.pk,), fields='text,group')
+        self.assertEqual(data, {'text': self.post.text, 'group': 'group'})
+        _, data = self.get('post_comments', (self.post.pk,))
+        self.assertEqual(data['results'][0]['text'], 'Ответ')
+        self.assertEqual(data['results'][0]['author'], 'reader')
+        response, _ = self.get('post', (self.post.pk + 100,))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_feed_needs_login(self):
+        response, _ = self.get('follow_posts')
+        self.assertEqual(response.status_code, 401)
+        _, data = self.get('follow_posts', client=self.reader_client)
+        self.assertEqual(len(data['results']), 10)
+
+    def test_follow_feed_values(self):
+        """Строки ленты подписок берутся из входящих и напрямую у
+        популярных авторов без повторов.
+        """
+        _, inbox = self.get(
+            'follow_posts', client=self.reader_client, fields='id,author'
+        )
+        with override_settings(FEED_FANOUT_LIMIT=0):
+            _, direct = self.get(
+                'follow_posts', client=self.reader_client,
+                fields='id,author',
+            )
+        self.assertEqual(direct, inbox)
+        self.assertEqual(set(inbox['results'][0]), {'id', 'author'})
+        _, second = self.get(
+            'follow_posts', client=self.reader_client, after=inbox['next']
+        )
+        self.assertEqual(len(second['results']), 5)
+
+    def test_gzip(self):
+        response = self.client.get(
+            reverse('api_v1:posts'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 10)
+
+    def test_etag_differs_from_encoded_body(self):
+        """Сжатый и несжатый ответ не делят сильный ETag."""
+        url = reverse('api_v1:posts')
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        for response in (plain, compressed):
+            self.assertTrue(response['ETag'].startswith('W/"'))
+            self.assertIn('Accept-Encoding', response['Vary'])
+        not_modified = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=compressed['ETag'],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertIn('Accept-Encoding', not_modified['Vary'])
+
+    def test_query_count(self):
+        with self.assertQueryBudget(2, 'api posts'):
+            self.get('posts')
+        with self.assertQueryBudget(3, 'api group posts'):
+            self.get('group_posts', (self.group.slug,))
+        # Сессия, пользователь, популярные авторы, входящие.
+        with self.assertQueryBudget(4, 'api follow posts'):
+            self.get('follow_posts', client=self.reader_client)
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase
+
+from core import benchmarks
+from posts.models import Follow
+from posts.urls import urlpatterns as posts_urlpatterns
+from users.urls import urlpatterns as users_urlpatterns
+
+
+class BenchmarksTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_scale', stdout=StringIO(), seed=1, end=benchmarks.SEED_END,
+            users=10, groups=3, posts=30, comments=60, follows=15,
+        )
+
+    def test_every_route_is_measured(self):
+        names = {f'posts:{pattern.name}' for pattern in posts_urlpatterns}
+        names |= {f'users:{pattern.name}' for pattern in users_urlpatterns}
+        self.assertEqual(set(benchmarks.routes()), names)
+
+    def test_measure_routes(self):
+        results = benchmarks.measure_routes(repeat=2)
+        index = results['posts:index']
+        self.assertEqual(set(index), set(benchmarks.MODES))
+        self.assertGreater(index['cold']['queries'], 0)
+        self.assertGreater(index['cold']['rows'], 0)
+        self.assertGreater(index['warm']['bytes'], 0)
+        self.assertGreater(results['posts:export']['cold']['bytes'], 0)
+
+    def test_follow_routes_change_data_every_time(self):
+        routes = benchmarks.routes()
+        for name, delta in (
+            ('posts:profile_follow', 1), ('posts:profile_unfollow', -1),
+        ):
+            send, prepare = routes[name]
+            for _ in range(2):
+                with self.subTest(route=name):
+                    prepare()
+                    before = Follow.objects.count()
+                    send()
+                    self.assertEqual(Follow.objects.count(), before + delta)
+
+    def test_queries_and_rows_from_one_iteration(self):
+        sizes = iter([3, 1])
+
+        def send():
+            for _ in range(next(sizes)):
+                Follow.objects.exists()
+            return HttpResponse()
+
+        result = benchmarks.measure(send, repeat=2, cold=True)
+        self.assertEqual(result['queries'], 3)
+        self.assertEqual(result['rows'], 3)
+
+    def test_regressions(self):
+        baseline = {'sizes': {'100': {'posts:index': {'warm': {
+            'p50_ms': 10, 'p95_ms': 1, 'queries': 4, 'rows': 10,
+            'bytes': 1000,
+        }}}}}
+        results = {'sizes': {'100': {'posts:index': {'warm': {
+            'p50_ms': 16, 'p95_ms': 9, 'queries': 5, 'rows': 12,
+            'bytes': 1300,
+        }}}, '1000': {'posts:index': {'warm': {'queries': 9}}}}}
+        found = benchmarks.regressions(baseline, results, threshold=0.25)
+        self.assertEqual(found, [
+            'posts:index [100, warm] p50_ms: 10 → 16',
+            'posts:index [100, warm] queries: 4 → 5',
+            'posts:index [100, warm] bytes: 1000 → 1300',
+        ])
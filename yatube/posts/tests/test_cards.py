@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import caching, cards
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Старый текст', author=cls.author)
+        Post.objects.create(text='Другой пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def renders(self, url):
+        with mock.patch.object(
+            cards, 'render_to_string', wraps=cards.render_to_string
+        ) as render:
+            response = self.client.get(url)
+        return response, render.call_count
+
+    def test_card_rendered_once_for_all_feeds(self):
+        """Карточка из ленты переиспользуется на других страницах."""
+        _, rendered = self.renders(reverse('posts:index'))
+        self.assertEqual(rendered, 2)
+        caching.bump('all')
+        response, rendered = self.renders(reverse('posts:index'))
+        self.assertEqual(rendered, 0)
+        self.assertContains(response, 'Старый текст')
+
+    def test_edit_renders_new_card(self):
+        self.renders(reverse('posts:index'))
+        self.post.text = 'Новый текст'
+        self.post.save()
+        response, rendered = self.renders(reverse('posts:index'))
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Старый текст')
+
+    def test_author_rename_renders_new_cards(self):
+        self.renders(reverse('posts:index'))
+        self.author.first_name = 'Лев'
+        self.author.save()
+        response, rendered = self.renders(reverse('posts:index'))
+        self.assertEqual(rendered, 2)
+        self.assertContains(response, 'Автор: Лев')
+
+    def test_author_rename_keeps_edit_time(self):
+        """Время правки поста в API не меняется от имени автора."""
+        updated_at = self.post.updated_at
+        self.author.first_name = 'Лев'
+        self.author.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated_at, updated_at)
+
+    def test_group_rename_renders_new_cards(self):
+        group = Group.objects.create(
+            title='Старая группа', slug='group', description='-'
+        )
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        url = reverse('posts:profile', args=[self.author.username])
+        self.renders(url)
+        updated_at = Post.objects.get(pk=self.post.pk).updated_at
+        group.title = 'Новая группа'
+        group.save()
+        response, rendered = self.renders(url)
+        self.assertEqual(rendered, 1)
+        self.assertContains(response, 'Группа: Новая группа')
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).updated_at, updated_at
+        )
+
+    def test_profile_card_is_separate(self):
+        self.renders(reverse('posts:index'))
+        _, rendered = self.renders(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(rendered, 2)
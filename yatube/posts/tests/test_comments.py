@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Post
+from posts.views import COMMENTS_PER_PAGE
+
+User = get_user_model()
+
+
+class PostCommentsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        start = timezone.now()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Ответ {i}')
+            for i in range(COMMENTS_PER_PAGE + 5)
+        )
+        cls.comments = list(Comment.objects.order_by('id'))
+        for number, comment in enumerate(cls.comments):
+            comment.created = start + timedelta(minutes=number)
+        Comment.objects.bulk_update(cls.comments, ['created'])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def texts(self, page):
+        return [comment.text for comment in page]
+
+    def test_post_detail_shows_first_batch(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        page = response.context['comments']
+        self.assertEqual(
+            self.texts(page),
+            [comment.text for comment in self.comments[:COMMENTS_PER_PAGE]],
+        )
+        self.assertContains(response, 'data-load-more')
+
+    def test_newest_first(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]),
+            {'order': 'new'},
+        )
+        self.assertEqual(
+            self.texts(response.context['comments'])[:2],
+            ['Ответ 24', 'Ответ 23'],
+        )
+
+    def test_load_more_fragment(self):
+        """Фрагмент отдаёт следующую порцию без разметки страницы."""
+        first = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk]),
+            {'after': first.paginator.next_cursor},
+        )
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            [comment.text for comment in self.comments[COMMENTS_PER_PAGE:]],
+        )
+        self.assertNotContains(response, '<html')
+        self.assertNotContains(response, 'data-load-more')
+
+    def test_load_more_link_without_js(self):
+        """Ссылка «Показать ещё» ведёт на полную страницу поста."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        first = self.client.get(url).context['comments']
+        next_url = (
+            f'{url}?order=old&after={first.paginator.next_cursor}'
+        )
+        response = self.client.get(url)
+        self.assertContains(response, f'href="{next_url}"')
+        response = self.client.get(next_url)
+        self.assertContains(response, '<html')
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            [comment.text for comment in self.comments[COMMENTS_PER_PAGE:]],
+        )
+
+    def test_fragment_unknown_post(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk + 100])
+        )
+        self.assertEqual(response.status_code, 404)
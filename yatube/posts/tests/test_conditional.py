@@ -0,0 +1,107 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Comment, Group, Post
+from posts.tests.utils import SharedCacheMixin
+
+User = get_user_model()
+
+
+class ConditionalGetTest(SharedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+
+    def test_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+                repeated = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(repeated.status_code, 304)
+                self.assertEqual(repeated.content, b'')
+
+    def test_changes_invalidate_validators(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.author, text='!')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_validators_are_shared(self):
+        """Страница одна для всех, и ETag гостя подходит пользователю."""
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cache_control(self):
+        for client in (self.guest_client, self.author_client):
+            with self.subTest(client=client):
+                cache_control = client.get(
+                    reverse('posts:index')
+                )['Cache-Control']
+                self.assertIn('public', cache_control)
+                self.assertIn('no-cache', cache_control)
+
+
+class LocalCacheConditionalGetTest(TestCase):
+    """С LocMemCache поколения свои у каждого процесса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_no_validators(self):
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_outside_change_is_not_hidden_by_304(self):
+        """Пост, добавленный мимо сигналов (другим процессом, командой),
+        не прячется за 304, когда страница ушла из кэша.
+        """
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.bulk_create([Post(text='Снаружи', author=self.author)])
+        cache.clear()
+        response = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH='*',
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Снаружи')
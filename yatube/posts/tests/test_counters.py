@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import counters
+from posts.models import Comment, Counter, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def test_counters_follow_writes(self):
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group)
+        Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(counters.get(counters.ALL_POSTS, 0), 2)
+        self.assertEqual(
+            counters.get(counters.AUTHOR_POSTS, self.author.pk), 2)
+        self.assertEqual(counters.get(counters.GROUP_POSTS, self.group.pk), 1)
+        self.assertEqual(counters.get(counters.POST_COMMENTS, post.pk), 1)
+        self.assertEqual(counters.get(counters.FOLLOWERS, self.author.pk), 1)
+        self.assertEqual(counters.get(counters.FOLLOWING, self.reader.pk), 1)
+
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(counters.get(counters.GROUP_POSTS, self.group.pk), 0)
+        self.assertEqual(
+            counters.get(counters.GROUP_POSTS, self.other_group.pk), 1)
+
+        post.delete()
+        follow.delete()
+        self.assertEqual(
+            counters.get(counters.AUTHOR_POSTS, self.author.pk), 1)
+        self.assertEqual(counters.get(counters.POST_COMMENTS, post.pk), 0)
+        self.assertEqual(counters.get(counters.FOLLOWERS, self.author.pk), 0)
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        Post.objects.create(text='Пост', author=self.author)
+        Counter.objects.filter(name=counters.AUTHOR_POSTS).update(value=7)
+        Counter.objects.create(
+            name=counters.POST_COMMENTS, object_id=999, value=3)
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assertEqual(
+            counters.get(counters.AUTHOR_POSTS, self.author.pk), 1)
+        self.assertEqual(counters.get(counters.POST_COMMENTS, 999), 0)
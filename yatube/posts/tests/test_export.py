@@ -0,0 +1,119 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import QueryPlanMixin
+from posts import exporter
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group,
+            image='posts/cat.jpg',
+        )
+        Post.objects.create(text='Пост без группы', author=cls.author)
+        Post.objects.create(text='Чужой пост', author=cls.reader)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def export(self, name, **options):
+        path = os.path.join(self.directory, name)
+        call_command('export_yatube', path, stdout=StringIO(), **options)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as stream:
+            return [json.loads(line) for line in stream]
+
+    def test_export_round_trips_through_import(self):
+        records = self.export('site.jsonl', batch_size=2)
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['post'] * 3 + ['comment', 'follow'],
+        )
+        self.assertEqual(records[0]['image'], 'posts/cat.jpg')
+        path = os.path.join(self.directory, 'site.jsonl')
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        call_command('import_yatube', path, stdout=StringIO())
+        post = Post.objects.get(text='Пост в группе')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.comments.get().author, self.reader)
+        self.assertTrue(Follow.objects.filter(author=self.author).exists())
+
+    def test_filters(self):
+        records = self.export('group.jsonl', group='test-slug')
+        self.assertEqual(
+            [(record['type'], record['text']) for record in records],
+            [('post', 'Пост в группе'), ('comment', 'Да')],
+        )
+        records = self.export('reader.jsonl', author='reader')
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['post', 'comment', 'follow'],
+        )
+        self.assertEqual(self.export('future.jsonl', since='2999-01-01'), [])
+
+    def test_resume_from_checkpoint(self):
+        checkpoint = os.path.join(self.directory, 'state.json')
+        dump = exporter.dump
+        calls = []
+
+        def failing_dump(kind, row):
+            calls.append(kind)
+            if len(calls) == 3:
+                raise RuntimeError('обрыв')
+            return dump(kind, row)
+
+        with mock.patch.object(exporter, 'dump', side_effect=failing_dump):
+            with self.assertRaises(RuntimeError):
+                self.export('site.jsonl.gz', batch_size=1,
+                            checkpoint=checkpoint)
+        self.assertTrue(os.path.exists(checkpoint))
+        records = self.export(
+            'site.jsonl.gz', batch_size=1, checkpoint=checkpoint
+        )
+        self.assertEqual(len(records), 5)
+        self.assertEqual(
+            len({(record['type'], record.get('id')) for record in records}),
+            5,
+        )
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_download_streams_own_data(self):
+        client = Client()
+        client.force_login(self.author)
+        with self.assertIndexedQueries('export'):
+            response = client.get(reverse('posts:export'))
+            content = b''.join(response.streaming_content).decode()
+        self.assertIn('yatube-author.jsonl', response['Content-Disposition'])
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['post', 'post', 'comment'],
+        )
+        self.assertNotIn('Чужой пост', content)
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        Post.objects.create(text='Чужой пост', author=self.other)
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.user, post=post).exists())
+        self.assertEqual(self.feed(), [post.pk])
+
+    def test_follow_backfills_and_unfollow_trims_inbox(self):
+        posts = [
+            Post.objects.create(text='Пост', author=self.author)
+            for _ in range(3)
+        ]
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'writer'}))
+        self.assertEqual(FeedItem.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.feed(), [post.pk for post in posts[::-1]])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'writer'}))
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_on_request(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(FeedItem.objects.exists())
+        self.assertEqual(self.feed(), [post.pk])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_author_crossing_the_limit_keeps_feed_complete(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        before = Post.objects.create(text='До порога', author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        self.assertFalse(FeedItem.objects.filter(author=self.author).exists())
+        during = Post.objects.create(text='Над порогом', author=self.author)
+        self.assertEqual(self.feed(), [during.pk, before.pk])
+        Follow.objects.filter(user=self.other).delete()
+        self.assertEqual(
+            set(FeedItem.objects.filter(user=self.user).values_list(
+                'post', flat=True
+            )),
+            {before.pk, during.pk},
+        )
+        cache.clear()
+        self.assertEqual(self.feed(), [during.pk, before.pk])
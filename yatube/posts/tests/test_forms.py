@@ -1,12 +1,16 @@
 import shutil
 import tempfile
+from io import BytesIO
+from unittest import mock, skipUnless
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageCms, features
 
+from posts import images
 from posts.models import Group, Post, Comment
 from posts.forms import PostForm, CommentForm
 
@@ -205,3 +209,90 @@ class CommentFormTests(TestCase):
             follow=True
         )
         self.assertEqual(Comment.objects.count(), comments_count)
+
+
+@override_settings(POST_IMAGE_MAX_SIDE=100, POST_IMAGE_FORMAT='JPEG')
+class PostImageIngestTests(TestCase):
+    @staticmethod
+    def upload(name, size, image_format, **params):
+        buffer = BytesIO()
+        Image.effect_noise(size, 64).convert('RGB').save(
+            buffer, image_format, **params
+        )
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def clean(self, upload):
+        form = PostForm(data={'text': 'text'}, files={'image': upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.cleaned_data['image']
+
+    def test_large_photo_is_normalized(self):
+        """Большое фото уменьшается, поворачивается и теряет EXIF."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        upload = self.upload(
+            'photo.jpg', (400, 200), 'JPEG', exif=exif.tobytes()
+        )
+        image = self.clean(upload)
+        self.assertEqual(image.name, 'photo.jpg')
+        self.assertLess(image.size, upload.size)
+        with Image.open(image) as stored:
+            self.assertEqual(stored.size, (50, 100))
+            self.assertNotIn('exif', stored.info)
+            self.assertTrue(stored.info.get('progressive'))
+
+    def test_large_photo_is_reduced_before_rotation(self):
+        """Поворот по EXIF учитывается и после уменьшения."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        upload = self.upload(
+            'photo.jpg', (800, 400), 'JPEG', exif=exif.tobytes()
+        )
+        with override_settings(POST_IMAGE_MAX_SIDE=200):
+            image = self.clean(upload)
+        with Image.open(image) as stored:
+            self.assertEqual(stored.size, (100, 200))
+
+    def test_large_tiff_is_normalized(self):
+        """TIFF закрывает файл после загрузки пикселей, EXIF читается до."""
+        upload = self.upload('scan.tiff', (3000, 100), 'TIFF')
+        image = self.clean(upload)
+        self.assertEqual(image.name, 'scan.jpg')
+        with Image.open(image) as stored:
+            self.assertEqual(stored.size, (100, 3))
+
+    def test_processing_error_keeps_upload(self):
+        """Сбой Pillow при обработке не роняет форму."""
+        upload = self.upload('photo.jpg', (400, 200), 'JPEG')
+        with mock.patch.object(
+            images, 'flatten', side_effect=OSError
+        ), mock.patch.object(images.logger, 'exception') as log:
+            self.assertIs(self.clean(upload), upload)
+        log.assert_called_once()
+
+    def test_rgb_color_profile_is_kept(self):
+        """Профиль RGB, который нельзя перевести в sRGB, сохраняется."""
+        profile = b'not a real profile'
+        upload = self.upload(
+            'photo.jpg', (400, 200), 'JPEG', icc_profile=profile
+        )
+        with Image.open(self.clean(upload)) as stored:
+            self.assertEqual(stored.info.get('icc_profile'), profile)
+
+    @skipUnless(features.check('littlecms2'), 'нужна LittleCMS')
+    def test_color_profile_is_converted_to_srgb(self):
+        profile = ImageCms.ImageCmsProfile(
+            ImageCms.createProfile('sRGB')
+        ).tobytes()
+        upload = self.upload(
+            'photo.jpg', (400, 200), 'JPEG', icc_profile=profile
+        )
+        with Image.open(self.clean(upload)) as stored:
+            self.assertNotIn('icc_profile', stored.info)
+
+    def test_small_image_is_kept(self):
+        """Маленький файл без метаданных остаётся как есть."""
+        upload = SimpleUploadedFile(
+            'small.gif', PostFormTests.small_gif_1, 'image/gif'
+        )
+        self.assertIs(self.clean(upload), upload)
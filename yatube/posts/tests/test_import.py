@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import counters, thumbnails
+from posts.models import Comment, FeedItem, Follow, Group, Post
+from posts.search import filter_matching
+
+User = get_user_model()
+
+RECORDS = [
+    {'type': 'post', 'id': 'a1', 'author': 'author', 'group': 'cats',
+     'text': 'Импортированная кошка', 'pub_date': '2015-03-01T10:00:00'},
+    {'type': 'post', 'id': 'a2', 'author': 'newcomer',
+     'text': 'Второй пост', 'pub_date': '2016-05-02T12:30:00+00:00'},
+    {'type': 'comment', 'post': 'a1', 'author': 'reader', 'text': 'Мяу',
+     'created': '2015-03-02T09:00:00'},
+    {'type': 'comment', 'post': 'missing', 'author': 'reader', 'text': '?'},
+    {'type': 'follow', 'user': 'reader', 'author': 'author'},
+    {'type': 'follow', 'user': 'reader', 'author': 'reader'},
+]
+
+
+class ImportCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Post.objects.create(text='Старый пост', author=cls.author)
+
+    def run_import(self, content, suffix='.jsonl', **options):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        out = StringIO()
+        call_command('import_yatube', path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_jsonl_import_keeps_data_consistent(self):
+        content = '\n'.join(json.dumps(record) for record in RECORDS)
+        out = self.run_import(content, batch_size=2)
+        self.assertIn('Импортировано записей: 4', out)
+        self.assertIn('пропущено: 2', out)
+
+        post = Post.objects.get(text='Импортированная кошка')
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.updated_at, post.pub_date)
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        comment = Comment.objects.get(post=post)
+        self.assertEqual(comment.author, self.reader)
+        self.assertEqual(comment.created.day, 2)
+        self.assertFalse(
+            User.objects.get(username='newcomer').has_usable_password()
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .exists()
+        )
+        # Сигналы не срабатывали, но счётчики, лента и поиск сверены.
+        self.assertEqual(counters.get(counters.ALL_POSTS, 0), 3)
+        self.assertEqual(counters.get(counters.POST_COMMENTS, post.pk), 1)
+        self.assertEqual(counters.get(counters.FOLLOWERS, self.author.pk), 1)
+        self.assertEqual(counters.reconcile(), 0)
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(
+            list(filter_matching(Post.objects.all(), 'кошка')), [post]
+        )
+        Post.objects.create(text='Новая кошка', author=self.author)
+        self.assertEqual(
+            filter_matching(Post.objects.all(), 'кошка').count(), 2
+        )
+
+    def test_csv_import(self):
+        content = (
+            'type,id,author,group,text,pub_date\r\n'
+            'post,1,author,,Пост из CSV,2014-01-01T00:00:00\r\n'
+        )
+        self.run_import(content, suffix='.csv')
+        post = Post.objects.get(text='Пост из CSV')
+        self.assertIsNone(post.group)
+        self.assertEqual(timezone.localtime(post.pub_date).year, 2014)
+
+    def test_images_need_thumbnails(self):
+        """Импорт идёт мимо сигналов: миниатюры создаются командой,
+        которую он выводит.
+        """
+        Post.objects.create(
+            text='Старая картинка', author=self.author, image='posts/old.jpg'
+        )
+        records = [
+            dict(RECORDS[0], image='posts/cat.jpg'),
+            RECORDS[1],
+        ]
+        out = self.run_import('\n'.join(map(json.dumps, records)))
+        imported = Post.objects.get(text='Импортированная кошка')
+        command = f'generate_thumbnails --from-id {imported.pk}'
+        self.assertIn('Постов с картинкой: 1', out)
+        self.assertIn(command, out)
+        with mock.patch.object(thumbnails, 'generate') as generate:
+            call_command(
+                'generate_thumbnails', from_id=imported.pk, workers=0,
+                stdout=StringIO(),
+            )
+        generate.assert_called_once_with(imported.pk)
+
+    def test_bad_record_reports_line(self):
+        content = json.dumps(RECORDS[0]) + '\n{"type": "post"}\n'
+        with self.assertRaisesMessage(CommandError, 'строка 2: нет поля'):
+            self.run_import(content, batch_size=1)
+        self.assertTrue(
+            filter_matching(Post.objects.all(), 'кошка').exists()
+        )
+        # Первая пачка осталась, и счётчики для неё уже сверены.
+        self.assertEqual(
+            counters.get(counters.ALL_POSTS, 0), Post.objects.count()
+        )
+        self.assertEqual(counters.reconcile(), 0)
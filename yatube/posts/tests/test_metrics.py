@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(
+            METRICS_FILE=os.path.join(directory, 'metrics')
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_counts_per_view(self):
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:index'))
+        self.client.get('/missing/')
+        snapshot = metrics.shared_counters().snapshot()
+        index = snapshot['posts:index']
+        self.assertEqual(index['requests'], 2)
+        self.assertGreater(index['queries'], 0)
+        self.assertGreater(index['cache_hits'], 0)
+        self.assertGreater(index['cache_misses'], 0)
+        self.assertEqual(
+            index['response_bytes'], 2 * len(response.content)
+        )
+        self.assertEqual(
+            sum(index[f'bucket_{i}'] for i in range(len(metrics.BUCKETS))),
+            2,
+        )
+        self.assertEqual(snapshot[metrics.UNRESOLVED]['requests'], 1)
+
+    def test_slots_are_shared_and_limited(self):
+        path = metrics.shared_counters().path
+        first = metrics.SharedCounters(path, 2)
+        second = metrics.SharedCounters(path, 2)
+        first.add('a', {'requests': 1})
+        second.add('a', {'requests': 2})
+        second.add('b', {'requests': 1})
+        first.add('c', {'requests': 1})
+        self.assertEqual(
+            {name: values['requests']
+             for name, values in first.snapshot().items()},
+            {'a': 3, 'b': 1},
+        )
+
+    def test_endpoint(self):
+        self.client.get(reverse('posts:index'))
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            body,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 1',
+            body,
+        )
+        self.assertIn('yatube_sql_queries_total{view="posts:index"}', body)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_endpoint_is_private(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_proxied_request_needs_token(self):
+        """За локальным прокси адрес 127.0.0.1 не доказывает, что
+        запрос внутренний.
+        """
+        response = self.client.get(
+            reverse('metrics'), HTTP_X_FORWARDED_FOR='203.0.113.5'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION='Bearer secret',
+            REMOTE_ADDR='203.0.113.5',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_file_name_follows_layout(self):
+        """Файл с другой раскладкой слотов не переиспользуется."""
+        default = metrics.shared_counters().path
+        with override_settings(METRICS_SLOTS=8):
+            self.assertNotEqual(metrics.shared_counters().path, default)
+        self.assertNotEqual(
+            metrics.shared_counters('.templates', ('renders',)).path,
+            default,
+        )
+
+    def test_disabled(self):
+        path = metrics.shared_counters().path
+        with override_settings(METRICS_FILE=None):
+            self.client.get(reverse('posts:index'))
+            response = self.client.get(
+                reverse('metrics'), REMOTE_ADDR='127.0.0.1'
+            )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(metrics.SharedCounters(path, 2).snapshot(), {})
@@ -0,0 +1,45 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+
+BEFORE = [('auth', '0011_update_proxy_permissions'), ('posts', '0006_follow')]
+AFTER = [('posts', '0013_backfill_feed')]
+
+
+class FeedBackfillMigrationTest(TransactionTestCase):
+    """Подписки, сделанные до появления входящих лент, получают их."""
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_existing_follows_fill_inbox(self):
+        apps = self.migrate(BEFORE)
+        User = apps.get_model('auth', 'User')
+        Post = apps.get_model('posts', 'Post')
+        Follow = apps.get_model('posts', 'Follow')
+        author, popular, reader, other = (
+            User.objects.create(username=name)
+            for name in ('author', 'popular', 'reader', 'other')
+        )
+        for index in range(5):
+            Post.objects.create(author=author, text=f'Пост {index}')
+        Post.objects.create(author=popular, text='Популярный')
+        Follow.objects.create(user=reader, author=author)
+        Follow.objects.create(user=reader, author=popular)
+        Follow.objects.create(user=other, author=popular)
+
+        apps = self.migrate(AFTER)
+        FeedItem = apps.get_model('posts', 'FeedItem')
+        self.assertEqual(
+            sorted(FeedItem.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            [('reader', 'author')] * 5,
+        )
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class SharedPagesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_pages_do_not_vary_by_user(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.author_client.get(url)
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+                self.assertNotContains(response, 'Пользователь: author')
+                self.assertNotContains(response, 'csrfmiddlewaretoken')
+                self.assertContains(response, 'data-personal')
+                self.assertEqual(
+                    self.reader_client.get(url).content, response.content
+                )
+
+    def personal(self, client, **parts):
+        response = client.get(reverse('posts:personal'), parts)
+        self.assertIn('no-cache', response['Cache-Control'])
+        return response.json()
+
+    def test_personal_parts(self):
+        parts = self.personal(
+            self.reader_client, nav='', follow='author',
+            edit=self.post.pk, comment_form=self.post.pk,
+        )
+        self.assertIn('Пользователь: reader', parts['nav'])
+        self.assertIn('Отписаться', parts['follow'])
+        self.assertNotIn('редактировать', parts['edit'])
+        self.assertIn('csrfmiddlewaretoken', parts['comment_form'])
+
+        parts = self.personal(self.author_client, edit=self.post.pk)
+        self.assertIn('редактировать', parts['edit'])
+
+    def test_guest_parts(self):
+        parts = self.personal(
+            self.guest_client, nav='', follow='author',
+            comment_form=self.post.pk,
+        )
+        self.assertIn('Войти', parts['nav'])
+        self.assertIn('Подписаться', parts['follow'])
+        self.assertNotIn('<form', parts['comment_form'])
+
+    def test_parts_mark_current_view(self):
+        parts = self.personal(
+            self.reader_client, nav='', switcher='', view='posts:index'
+        )
+        self.assertRegex(
+            parts['switcher'], r'nav-link active"\s*href="/"'
+        )
+        parts = self.personal(
+            self.reader_client, nav='', switcher='',
+            view='posts:post_create',
+        )
+        self.assertNotIn('active', parts['switcher'])
+        self.assertRegex(parts['nav'], r'active\s*"\s*href="/create/"')
+
+    def test_page_without_js(self):
+        """Ссылка из noscript отдаёт страницу с личными частями."""
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.reader_client.get(url)
+        self.assertContains(response, '<noscript>')
+        personal_url = response.wsgi_request.personal_url
+        self.assertEqual(personal_url, f'{url}?personal=')
+        for _ in range(2):
+            response = self.reader_client.get(personal_url)
+            self.assertContains(response, 'Пользователь: reader')
+            self.assertContains(response, 'Отписаться')
+            self.assertIn('no-cache', response['Cache-Control'])
+        response = self.author_client.get(reverse('posts:index'), {
+            'personal': '',
+        })
+        self.assertContains(response, 'Пользователь: author')
+
+    def test_unknown_objects_are_skipped(self):
+        parts = self.personal(self.reader_client, follow='nobody', edit='x')
+        self.assertEqual(parts, {})
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+
+User = get_user_model()
+
+
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        override = override_settings(PROFILING_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def profiles(self):
+        return [profiling.load(path) for path in profiling.stored()]
+
+    def test_not_profiled_by_default(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:index'), {'profile': ''})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self.profiles(), [])
+
+    def test_staff_query_flag(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:index'), {'profile': ''})
+        profile, = self.profiles()
+        self.assertEqual(profile['view'], 'posts:index')
+        self.assertEqual(profile['trigger'], 'staff')
+        self.assertGreater(profile['duration_ms'], 0)
+        self.assertTrue(
+            profiling.stored()[0].endswith(response['X-Profile-Id'])
+        )
+
+    def test_signed_header(self):
+        self.client.get(reverse('posts:index'), HTTP_X_PROFILE='подделка')
+        self.assertEqual(self.profiles(), [])
+        self.client.get(
+            reverse('posts:index'), HTTP_X_PROFILE=profiling.make_token()
+        )
+        self.assertEqual(self.profiles()[0]['trigger'], 'header')
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_KEEP=2)
+    def test_ring_buffer(self):
+        for _ in range(3):
+            response = self.client.get(reverse('posts:index'))
+            self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(len(self.profiles()), 2)
+        self.assertEqual(self.profiles()[0]['trigger'], 'sample')
+
+    def test_sampler(self):
+        sampler = profiling.Sampler(threading.get_ident(), 0.001)
+        sampler.start()
+        finish = time.perf_counter() + 0.05
+        while time.perf_counter() < finish:
+            pass
+        stacks = sampler.stop()
+        self.assertTrue(stacks)
+        self.assertTrue(any(
+            'test_sampler (posts/tests/test_profiling.py' in stack
+            for stack in stacks
+        ))
+
+    def test_collapse(self):
+        profiling.save({'view': 'posts:index', 'samples': {'a;b': 2}})
+        profiling.save({'view': 'posts:index', 'samples': {'a;b': 1}})
+        profiling.save({'view': 'posts:search', 'samples': {'a;c': 4}})
+        out = StringIO()
+        call_command('collapse_profiles', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            'posts:index;a;b 3', 'posts:search;a;c 4',
+        ])
+        output = os.path.join(self.directory, 'out.collapsed')
+        call_command('collapse_profiles', output, view='posts:search',
+                     stdout=StringIO())
+        with open(output) as stream:
+            self.assertEqual(stream.read(), 'posts:search;a;c 4\n')
+        with self.assertRaises(CommandError):
+            call_command('collapse_profiles', view='about:tech',
+                         stdout=StringIO())
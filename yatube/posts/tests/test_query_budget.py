@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts.urls import urlpatterns
+from posts.models import FeedItem, Post
+from .utils import SeededViewsMixin
+
+User = get_user_model()
+
+# Число запросов не должно зависеть от числа строк в таблицах.
+QUERY_BUDGETS = {
+    'index': 4,
+    'group_list': 5,
+    'profile': 6,
+    'post_detail': 6,
+    'post_comments': 5,
+    'post_create': 5,
+    'post_edit': 6,
+    'add_comment': 7,
+    'search': 4,
+    'personal': 5,
+    # Строки выгрузки читаются уже при отдаче ответа.
+    'export': 2,
+    'follow_index': 5,
+    'profile_follow': 21,
+    # Отписка сверяет число подписчиков автора с порогом рассылки.
+    'profile_unfollow': 14,
+}
+
+
+class QueryBudgetTestBase(SeededViewsMixin, QueryBudgetMixin):
+    def test_every_url_has_budget(self):
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+        self.assertEqual(names, set(self.requests()))
+
+    def test_views_fit_query_budget(self):
+        for name, (method, *args) in self.requests().items():
+            with self.subTest(view=name, rows=self.rows):
+                cache.clear()
+                with self.assertQueryBudget(QUERY_BUDGETS[name], name):
+                    response = method(*args)
+                self.assertLess(response.status_code, 400)
+
+
+class SmallTableQueryBudgetTest(QueryBudgetTestBase, TestCase):
+    rows = 10
+
+
+class LargeTableQueryBudgetTest(QueryBudgetTestBase, TestCase):
+    rows = 1000
+
+
+class FollowQueryCountTest(TestCase):
+    def follow_queries(self, posts):
+        author = User.objects.create_user(username=f'author{posts}')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=author) for i in range(posts)
+        )
+        client = Client()
+        client.force_login(User.objects.create_user(username=f'r{posts}'))
+        with CaptureQueriesContext(connection) as context:
+            client.get(reverse(
+                'posts:profile_follow', kwargs={'username': author.username}
+            ))
+        self.assertEqual(
+            FeedItem.objects.filter(author=author).count(), posts
+        )
+        return len(context.captured_queries)
+
+    def test_follow_does_not_depend_on_post_count(self):
+        self.assertEqual(self.follow_queries(1), self.follow_queries(1500))
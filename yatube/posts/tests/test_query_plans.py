@@ -0,0 +1,26 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.testing import TEMP_SORT, QueryPlanMixin
+from .utils import SeededViewsMixin
+
+# Форма поста выводит все группы списком: полный просмотр ожидаем.
+ALLOWED_SCANS = {
+    'post_create': {'posts_group'},
+    'post_edit': {'posts_group'},
+    # Сортировка по релевантности идёт только по совпадениям из FTS5.
+    'search': {TEMP_SORT},
+}
+
+
+class QueryPlanTest(SeededViewsMixin, QueryPlanMixin, TestCase):
+    rows = 1000
+
+    def test_views_use_indexes(self):
+        for name, (method, *args) in self.requests().items():
+            with self.subTest(view=name):
+                cache.clear()
+                with self.assertIndexedQueries(
+                    name, ALLOWED_SCANS.get(name, ())
+                ):
+                    method(*args)
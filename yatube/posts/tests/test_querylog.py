@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import querylog
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание',
+        )
+        Post.objects.create(author=cls.author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.log = os.path.join(directory, 'slow.jsonl')
+        self.addCleanup(shutil.rmtree, directory)
+        patcher = mock.patch.object(querylog, 'logger')
+        self.logger = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, url, threshold_ms):
+        with override_settings(
+            SLOW_QUERY_MS=threshold_ms, SLOW_QUERY_LOG=self.log
+        ):
+            self.client.get(url)
+        return list(querylog.read(self.log))
+
+    def test_normalize(self):
+        self.assertEqual(
+            querylog.normalize(
+                "SELECT * FROM t WHERE a = 'x''y' AND b IN (%s, %s, 3)\n"
+                "  LIMIT 20"
+            ),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?',
+        )
+        self.assertEqual(
+            querylog.fingerprint('SELECT 1 WHERE id IN (%s)'),
+            querylog.fingerprint('SELECT 2 WHERE id IN (%s, %s)'),
+        )
+
+    def test_fast_queries_are_not_logged(self):
+        self.assertEqual(self.get(reverse('posts:index'), 10 ** 6), [])
+        self.assertEqual(self.get(reverse('posts:index'), None), [])
+
+    def test_entry(self):
+        entries = self.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}), 0
+        )
+        self.assertTrue(entries)
+        entry = entries[0]
+        self.assertEqual(entry['view'], 'posts:group_list')
+        self.assertEqual(entry['path'], '/group/test-slug/')
+        self.assertTrue(entry['code'].startswith('posts/'))
+        self.assertIsInstance(entry['plan'], list)
+        self.assertTrue(entry['plan'])
+        self.assertTrue(all(entry['code'] for entry in entries))
+        self.assertEqual(self.logger.warning.call_count, len(entries))
+        self.assertTrue(all('params' not in entry for entry in entries))
+
+    @override_settings(SLOW_QUERY_LOG_PARAMS=True)
+    def test_params_are_opt_in(self):
+        entries = self.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}), 0
+        )
+        self.assertIn(["'test-slug'"], [entry['params'] for entry in entries])
+
+    def test_template_location(self):
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        log = querylog.SlowQueryLog(request, 'default', 0)
+        with override_settings(SLOW_QUERY_LOG=self.log):
+            with connection.execute_wrapper(log):
+                Template('\n{{ posts.count }}').render(
+                    Context({'posts': Post.objects.all()})
+                )
+        entry, = querylog.read(self.log)
+        self.assertEqual(entry['view'], querylog.UNRESOLVED)
+        self.assertTrue(entry['template'].endswith(':2'))
+        self.assertTrue(entry['code'].startswith('posts/tests/'))
+
+    def test_command(self):
+        self.get(reverse('posts:index'), 0)
+        cache.clear()
+        self.get(reverse('posts:index'), 0)
+        out = StringIO()
+        call_command('slow_queries', log=self.log, top=2, order='count',
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('1. ['))
+        self.assertIn('2 раз', lines[0])
+        self.assertIn('Представления: posts:index', out.getvalue())
+        self.assertIn('план: ', out.getvalue())
+
+    def test_command_without_log(self):
+        out = StringIO()
+        call_command('slow_queries', log=self.log, stdout=out)
+        self.assertIn('Медленных запросов нет', out.getvalue())
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.admin import PostAdmin
+from posts.models import Post
+from posts.search import match_expression
+
+User = get_user_model()
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.posts = Post.objects.bulk_create(
+            Post(text=f'Кошка номер {number} <b>', author=cls.author)
+            for number in range(15)
+        )
+        Post.objects.create(text='Про собак', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, **params):
+        return self.client.get(reverse('posts:search'), params)
+
+    def test_match_expression(self):
+        self.assertEqual(match_expression('кош "номер'), '"кош"* "номер"*')
+        self.assertEqual(match_expression(' ;- '), '')
+
+    def test_ranked_cursor_pages(self):
+        """Результаты идут страницами по курсору, без повторов."""
+        first = self.search(q='кошка').context['page_obj']
+        self.assertEqual(len(first), 10)
+        self.assertTrue(first.has_next())
+        second = self.search(
+            q='кошка', after=first.paginator.next_cursor
+        ).context['page_obj']
+        self.assertEqual(len(second), 5)
+        self.assertFalse(second.has_next())
+        found = {post.pk for post in first} | {post.pk for post in second}
+        self.assertEqual(len(found), 15)
+        back = self.search(
+            q='кошка', before=second.paginator.previous_cursor
+        ).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in back], [post.pk for post in first]
+        )
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        response = self.search(q='собак')
+        self.assertContains(response, '<mark>собак</mark>')
+        response = self.search(q='кошка')
+        self.assertContains(response, '&lt;b&gt;')
+        self.assertContains(response, 'q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B0&')
+
+    def test_index_follows_edits(self):
+        post = Post.objects.get(text='Про собак')
+        post.text = 'Про котов'
+        post.save()
+        self.assertEqual(len(self.search(q='собак').context['page_obj']), 0)
+        self.assertEqual(len(self.search(q='котов').context['page_obj']), 1)
+        post.delete()
+        self.assertEqual(len(self.search(q='котов').context['page_obj']), 0)
+
+    def test_empty_query(self):
+        response = self.search(q='')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_query_without_words(self):
+        """Запрос из одних знаков не доходит до MATCH."""
+        response = self.search(q='!!!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 0)
+        queryset, _ = PostAdmin(Post, None).get_search_results(
+            None, Post.objects.all(), '!!!'
+        )
+        self.assertEqual(list(queryset), [])
+
+    def test_admin_search_uses_index(self):
+        queryset, distinct = PostAdmin(Post, None).get_search_results(
+            None, Post.objects.all(), 'собак'
+        )
+        self.assertFalse(distinct)
+        self.assertEqual(list(queryset.values_list('text', flat=True)),
+                         ['Про собак'])
+        queryset, _ = PostAdmin(Post, None).get_search_results(
+            None, Post.objects.all(), 'кошка'
+        )
+        self.assertEqual(queryset.count(), 15)
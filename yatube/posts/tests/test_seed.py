@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import counters, seeding
+from posts.models import Comment, FeedItem, Follow, Group, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+OPTIONS = {
+    'users': 40, 'groups': 5, 'posts': 300, 'comments': 200,
+    'follows': 150, 'seed': 7, 'end': '2024-06-01',
+}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedScaleTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        out = StringIO()
+        call_command('seed_scale', stdout=out, **{**OPTIONS, **options})
+        return out.getvalue()
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('pub_date').values_list(
+                'author__username', 'group__slug', 'text', 'pub_date'
+            )),
+            sorted(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+        )
+
+    def test_same_seed_gives_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+        Post.objects.all().delete()
+        self.seed(seed=8)
+        self.assertNotEqual(self.snapshot()[0], first[0])
+
+    def test_default_end_is_fixed(self):
+        options = {name: value for name, value in OPTIONS.items()
+                   if name != 'end'}
+        call_command('seed_scale', stdout=StringIO(), **options)
+        first = self.snapshot()
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        self.seed(end=seeding.END)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_skewed_and_consistent(self):
+        out = self.seed()
+        self.assertIn('Постов: 300, комментариев: 200', out)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Comment.objects.count(), 200)
+        per_author = Counter(Post.objects.values_list('author', flat=True))
+        busiest, = per_author.most_common(1)
+        self.assertGreater(busiest[1], 300 / 40 * 3)
+        followers = Counter(Follow.objects.values_list('author', flat=True))
+        self.assertGreater(followers.most_common(1)[0][1], 150 / 40 * 3)
+        self.assertEqual(counters.reconcile(), 0)
+        self.assertTrue(FeedItem.objects.exists())
+
+    def test_images(self):
+        self.seed(images=0.5)
+        with_image = Post.objects.exclude(image='')
+        self.assertTrue(0 < with_image.count() < 300)
+        self.assertTrue(with_image.first().image.storage.exists(
+            with_image.first().image.name
+        ))
+
+    def test_images_are_reused(self):
+        """Повторный запуск ссылается на те же файлы картинок."""
+        self.seed(images=0.5)
+        first = set(Post.objects.values_list('image', flat=True))
+        Post.objects.all().delete()
+        self.seed(images=0.5)
+        self.assertEqual(
+            set(Post.objects.values_list('image', flat=True)), first
+        )
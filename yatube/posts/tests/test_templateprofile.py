@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+
+from django import forms
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import templateprofile
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TemplateProfileTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'metrics')
+        override = override_settings(
+            METRICS_FILE=path, TEMPLATE_PROFILING=True
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        self.assertIn('desc="template:posts/index.html x1"', header)
+        self.assertIn('desc="block:content x1"', header)
+        self.assertIn('include:includes/paginator.html', header)
+        self.assertTrue(header.startswith('tpl1;dur='))
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn(
+            'yatube_template_renders_total'
+            '{node="template:posts/index.html"} 1',
+            body,
+        )
+
+    def test_filters_and_tags(self):
+        templateprofile.install()
+        form = forms.Form()
+        form.fields['text'] = forms.CharField()
+        templateprofile.local.timings = timings = {}
+        try:
+            html = Template(
+                '{% load user_filters thumbnail %}'
+                '{{ form.text|addclass:"form-control" }}'
+                '{% thumbnail "" "10x10" as im %}{% endthumbnail %}'
+            ).render(Context({'form': form}))
+        finally:
+            templateprofile.local.timings = None
+        self.assertIn('class="form-control"', html)
+        self.assertEqual(timings['filter:addclass'][0], 1)
+        self.assertEqual(timings['tag:thumbnail'][0], 1)
+
+    @override_settings(TEMPLATE_PROFILING=False)
+    def test_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def run_now(*args, **kwargs):
+    return args[0](*args[1:], **kwargs)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.author,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def test_placeholder_until_generated(self):
+        """Пока миниатюры нет, страница не создаёт её сама."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        self.assertContains(response, 'Изображение обрабатывается')
+        self.assertIsNone(thumbnails.ready(self.post.image))
+
+        thumbnails.generate(self.post.pk)
+
+        thumbnail = thumbnails.ready(self.post.image)
+        self.assertIsNotNone(thumbnail)
+        response = self.client.get(url)
+        self.assertContains(response, thumbnail.url)
+        self.assertNotContains(response, 'Изображение обрабатывается')
+
+    def test_generation_renders_new_card(self):
+        """Карточка в ленте меняется, а время правки поста — нет."""
+        updated_at = self.post.updated_at
+        self.client.get(reverse('posts:index'))
+        thumbnails.generate(self.post.pk)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Изображение обрабатывается')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated_at, updated_at)
+
+    def test_failure_falls_back_to_original(self):
+        """Если миниатюры не создались, выводится исходное изображение."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.get(url)
+        with mock.patch.object(
+            thumbnails.default.backend, 'get_thumbnail',
+            side_effect=OSError('повреждённый файл'),
+        ), mock.patch.object(thumbnails.logger, 'exception'):
+            thumbnails.generate(self.post.pk)
+
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnails_failed)
+        response = self.client.get(url)
+        self.assertContains(response, self.post.image.url)
+        self.assertNotContains(response, 'Изображение обрабатывается')
+
+    def test_picture_variants(self):
+        """Карточка выводит srcset по ширинам и ленивую загрузку."""
+        thumbnails.generate(self.post.pk)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="960" height="339"')
+        for width in (320, 640, 960):
+            self.assertContains(response, f' {width}w')
+
+    def test_create_enqueues_generation(self):
+        """Новый пост с картинкой ставит миниатюры в очередь."""
+        with mock.patch.object(thumbnails.transaction, 'on_commit',
+                               side_effect=run_now):
+            self.client.post(reverse('posts:post_create'), data={
+                'text': 'Ещё один пост',
+                'image': SimpleUploadedFile(
+                    'other.gif', SMALL_GIF, 'image/gif'
+                ),
+            })
+        post = Post.objects.get(text='Ещё один пост')
+        self.assertIsNotNone(thumbnails.ready(post.image))
+
+    def test_command_generates_existing(self):
+        out = StringIO()
+        call_command('generate_thumbnails', workers=0, stdout=out)
+        self.assertIn('Обработано постов: 1', out.getvalue())
+        self.assertIsNotNone(thumbnails.ready(self.post.image))
+
+    def test_prefetch_batches_lookups(self):
+        """Миниатюры страницы находятся одним запросом к хранилищу sorl."""
+        second = Post.objects.create(
+            text='Второй пост',
+            author=self.author,
+            image=SimpleUploadedFile('second.gif', SMALL_GIF, 'image/gif'),
+        )
+        thumbnails.generate(self.post.pk)
+        cache.clear()
+        page_obj = Paginator(Post.objects.all(), 10).get_page(1)
+        with self.assertNumQueries(2):
+            thumbnails.prefetch(page_obj)
+        with self.assertNumQueries(0):
+            found = {
+                post.pk: thumbnails.for_post(post) for post in page_obj
+            }
+        self.assertEqual(
+            found[self.post.pk].name,
+            thumbnails.ready(self.post.image).name,
+        )
+        self.assertIsNone(found[second.pk])
@@ -3,13 +3,14 @@ import tempfile
 import time
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
 from django.core.cache import cache
 
+from posts import caching
 from posts.models import Group, Post, Follow
 from ..views import MAX_POSTS
 from http import HTTPStatus
@@ -209,6 +210,9 @@ class PaginatorViewsTest(TestCase):
             reverse('posts:profile', args=[cls.user.username])
         ]
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains_ten_records(self):
         # Проверка: количество постов на первой странице равно 10.
         for i in PaginatorViewsTest.templates:
@@ -221,6 +225,32 @@ class PaginatorViewsTest(TestCase):
             response = self.client.get((i) + '?page=2')
             self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_pages(self):
+        # Проверка: курсоры ведут на следующую и обратно на первую страницу.
+        for i in PaginatorViewsTest.templates:
+            with self.subTest(url=i):
+                first = self.client.get(i).context['page_obj']
+                next_cursor = first.paginator.next_cursor
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    i, {'after': next_cursor}).context['page_obj']
+                self.assertEqual(len(second), 3)
+                self.assertFalse(second.has_next())
+                self.assertEqual(
+                    [post.pk for post in second],
+                    [post.pk for post in Post.objects.order_by(
+                        '-pub_date', '-id')[MAX_POSTS:]]
+                )
+                back = self.client.get(
+                    i, {'before': second.paginator.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+                self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.client.get(reverse('posts:index'), {'after': 'xx'})
+        self.assertEqual(len(response.context['page_obj']), MAX_POSTS)
+
 
 class CacheViewsTest(TestCase):
     @classmethod
@@ -255,20 +285,120 @@ class CacheViewsTest(TestCase):
         self.assertNotContains(response, self.post.text)
 
     def test_cache(self):
-        """Проверка, что до сброса кэша страница та же, что до изменения"""
-        # Кажется, что не понял задание, прошу пояснить
+        """Проверка, что без изменений в ленте страница берётся из кэша,
+        а новый пост виден сразу, без сброса кэша."""
         response = self.authorized_client.get(reverse('posts:index'))
         content = response.content
+        # update() не отправляет сигналы, поколение ленты не меняется.
+        Post.objects.filter(pk=self.post.pk).update(text='test_update')
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response.content, content)
         Post.objects.create(
             text='test_cash',
             group=self.group,
             author=self.author
         )
         response = self.authorized_client.get(reverse('posts:index'))
-        self.assertEqual(response.content, content)
-        cache.clear()
-        response = self.authorized_client.get(reverse('posts:index'))
         self.assertNotEqual(response.content, content)
+        self.assertContains(response, 'test_cash')
+
+    def test_pages_are_cached(self):
+        """Страница целиком берётся из кэша, а браузер её не хранит."""
+        urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            self.authorized_client.get(url)
+        # update() не отправляет сигналы, поколения не меняются.
+        Post.objects.filter(pk=self.post.pk).update(text='test_update')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'test_post')
+                self.assertIn('max-age=0', response['Cache-Control'])
+
+    def test_cache_scopes(self):
+        """Изменения поста сбрасывают страницы группы, автора и поста."""
+        urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            self.authorized_client.get(url)
+        self.post.text = 'test_edited'
+        self.post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'test_edited')
+
+    def test_group_edit_resets_group_page(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.authorized_client.get(url)
+        self.group.description = 'new_description'
+        self.group.save()
+        self.assertContains(
+            self.authorized_client.get(url), 'new_description'
+        )
+
+    def test_group_delete_resets_pages(self):
+        """Удаление группы отвязывает посты без сигналов Post."""
+        group = Group.objects.create(
+            title='deleted_group', slug='deleted', description='-'
+        )
+        post = Post.objects.create(
+            text='grouped_post', group=group, author=self.author
+        )
+        urls = (
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[post.pk]),
+        )
+        group_url = reverse('posts:group_list', args=[group.slug])
+        for url in (*urls, group_url):
+            self.assertContains(
+                self.authorized_client.get(url), 'deleted_group'
+            )
+        group.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'grouped_post')
+                self.assertNotContains(response, 'deleted_group')
+        self.assertEqual(
+            self.authorized_client.get(group_url).status_code, 404
+        )
+
+    def test_user_edit_resets_author_pages(self):
+        scopes = ['all', f'author:{self.author.username}']
+        token = caching.generation_token(scopes)
+        self.client.force_login(self.author)
+        self.assertEqual(caching.generation_token(scopes), token)
+        self.author.first_name = 'Новое имя'
+        self.author.save()
+        self.assertNotEqual(caching.generation_token(scopes), token)
+
+    def test_page_timeout(self):
+        self.assertEqual(
+            caching.page_timeout(), settings.POSTS_LOCAL_CACHE_TIMEOUT
+        )
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }}):
+            self.assertEqual(
+                caching.page_timeout(), settings.POSTS_CACHE_TIMEOUT
+            )
+
+    def test_comment_resets_post_page(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.authorized_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'test_comment'}
+        )
+        self.assertContains(self.authorized_client.get(url), 'test_comment')
 
 
 class FollowViewsTest(TestCase):
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class SharedCacheMixin:
+    """Файловый кэш вместо LocMemCache: поколения общие для процессов."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shared = self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory,
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        super().setUp()
+
+
+class SeededViewsMixin:
+    """Данные на ``rows`` строк и по запросу к каждому маршруту posts."""
+    rows = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(cls.rows)
+        )
+        cls.post = Post.objects.filter(author=cls.author).first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text=f'Ответ {i}')
+            for i in range(cls.rows)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.other)
+        counters.reconcile()
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.other_client = Client()
+        self.other_client.force_login(self.other)
+
+    def requests(self):
+        post = {'post_id': self.post.pk}
+        return {
+            'index': (self.reader_client.get, reverse('posts:index')),
+            'group_list': (self.reader_client.get, reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug})),
+            'profile': (self.reader_client.get, reverse(
+                'posts:profile', kwargs={'username': 'author'})),
+            'post_detail': (self.reader_client.get, reverse(
+                'posts:post_detail', kwargs=post)),
+            'post_comments': (self.reader_client.get, reverse(
+                'posts:post_comments', kwargs=post), {'order': 'new'}),
+            'post_create': (self.author_client.get,
+                            reverse('posts:post_create')),
+            'post_edit': (self.author_client.get, reverse(
+                'posts:post_edit', kwargs=post)),
+            'add_comment': (self.reader_client.post, reverse(
+                'posts:add_comment', kwargs=post), {'text': 'Ещё'}),
+            'search': (self.reader_client.get, reverse('posts:search'),
+                       {'q': 'Пост'}),
+            'personal': (self.reader_client.get, reverse('posts:personal'), {
+                'nav': '', 'switcher': '', 'follow': 'author',
+                'edit': self.post.pk, 'comment_form': self.post.pk,
+            }),
+            'export': (self.reader_client.get, reverse('posts:export')),
+            'follow_index': (self.reader_client.get,
+                             reverse('posts:follow_index')),
+            # Подписка и отписка на автора со всеми ``rows`` постами.
+            'profile_follow': (self.other_client.get, reverse(
+                'posts:profile_follow', kwargs={'username': 'author'})),
+            'profile_unfollow': (self.reader_client.get, reverse(
+                'posts:profile_unfollow', kwargs={'username': 'author'})),
+        }
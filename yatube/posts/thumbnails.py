@@ -0,0 +1,202 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from PIL import features
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Карточка поста 960x339 выводится в нескольких ширинах и форматах;
+# браузер выбирает вариант по srcset/sizes.
+CARD_WIDTH, CARD_HEIGHT = 960, 339
+CARD_WIDTHS = (320, 640, 960, 1920)
+CARD_FORMATS = tuple(
+    image_format for image_format in ('WEBP', 'JPEG')
+    if image_format != 'WEBP' or features.check('webp')
+)
+CARD_SIZES = '(min-width: 992px) 960px, 100vw'
+MIME_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+
+
+def card(width, image_format='JPEG'):
+    """Геометрия и параметры sorl для варианта карточки."""
+    height = round(width * CARD_HEIGHT / CARD_WIDTH)
+    return f'{width}x{height}', {
+        'crop': 'center',
+        'upscale': width <= CARD_WIDTH,
+        'format': image_format,
+    }
+
+
+CARD = card(CARD_WIDTH)
+VARIANTS = [
+    (width, image_format)
+    for image_format in CARD_FORMATS
+    for width in CARD_WIDTHS
+]
+THUMBNAILS = [card(*variant) for variant in VARIANTS]
+
+
+class PreparedThumbnails(ThumbnailBackend):
+    """Находит уже готовую миниатюру, не создавая её."""
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_ready(self, file_, geometry_string, **options):
+        if not file_:
+            return None
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+    def get_ready_many(self, requests):
+        """Готовые миниатюры для пар (файл, (геометрия, параметры)): один
+        ``get_many`` в кэш и один запрос к таблице sorl для промахов.
+        """
+        if not isinstance(default.kvstore, KVStore):
+            return [
+                self.get_ready(file_, geometry, **options)
+                for file_, (geometry, options) in requests
+            ]
+        keys = [
+            add_prefix(self.thumbnail_file(file_, geometry, **options).key)
+            for file_, (geometry, options) in requests
+        ]
+        kv_cache = default.kvstore.cache
+        values = kv_cache.get_many(keys)
+        missing = [key for key in set(keys) if key not in values]
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            for key in missing:
+                values[key] = stored.get(key, EMPTY_VALUE)
+            kv_cache.set_many(
+                {key: values[key] for key in missing},
+                sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+            )
+        return [
+            None if values[key] == EMPTY_VALUE
+            else deserialize_image_file(values[key])
+            for key in keys
+        ]
+
+
+backend = PreparedThumbnails()
+# THUMBNAIL_WORKERS = 0 отключает пул: миниатюры создаются сразу.
+workers = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails',
+) if settings.THUMBNAIL_WORKERS else None
+
+
+def ready(image, spec=CARD):
+    geometry, options = spec
+    return backend.get_ready(image, geometry, **options)
+
+
+def variants(post):
+    """Готовые варианты карточки поста: {(ширина, формат): миниатюра}."""
+    prefetched = getattr(post, 'prefetched_thumbnails', None)
+    if prefetched is None:
+        found = backend.get_ready_many(
+            [(post.image, card(*variant)) for variant in VARIANTS]
+        )
+        prefetched = post.prefetched_thumbnails = dict(zip(VARIANTS, found))
+    return prefetched
+
+
+def for_post(post, spec=(CARD_WIDTH, 'JPEG')):
+    """Миниатюра поста: из предвыборки страницы или отдельным запросом."""
+    if not post.image:
+        return None
+    return variants(post).get(spec)
+
+
+def prefetch(page_obj):
+    """Находит миниатюры всех постов страницы до отрисовки шаблона."""
+    posts = [post for post in page_obj if post.image]
+    if not posts:
+        return
+    found = iter(backend.get_ready_many([
+        (post.image, card(*variant))
+        for post in posts
+        for variant in VARIANTS
+    ]))
+    for post in posts:
+        post.prefetched_thumbnails = {
+            variant: next(found) for variant in VARIANTS
+        }
+
+
+def generate(post_id):
+    """Создаёт все миниатюры поста и сбрасывает кэш его страниц.
+
+    Если создать их не удалось, пост помечается, и карточка выводит
+    исходное изображение вместо заглушки.
+    """
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is None or not post.image:
+        return
+    failed = False
+    try:
+        for geometry, options in THUMBNAILS:
+            default.backend.get_thumbnail(post.image, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры поста %s', post_id)
+        failed = True
+    Post.objects.filter(pk=post.pk).update(thumbnails_failed=failed)
+    # Карточки поста в кэше ещё с заглушкой вместо изображения.
+    caching.bump(f'card:post:{post.pk}')
+    caching.invalidate_post(post, {post.group_id})
+
+
+def generate_in_worker(post_id):
+    """``generate`` в потоке пула: соединение с базой у потока своё,
+    и закрыть его некому, кроме самой задачи.
+    """
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось обработать пост %s', post_id)
+    finally:
+        close_old_connections()
+
+
+def submit(post_id):
+    if workers is None:
+        generate(post_id)
+    else:
+        workers.submit(generate_in_worker, post_id)
+
+
+def enqueue(post):
+    """Ставит создание миниатюр в очередь после фиксации транзакции."""
+    if post.image:
+        transaction.on_commit(lambda: submit(post.pk))
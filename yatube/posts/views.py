@@ -1,33 +1,80 @@
 from django.core.paginator import Paginator
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.template.loader import render_to_string
+from django.views.decorators.cache import never_cache
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
+from django.db import transaction
 
-from .models import Group, Post, Follow
+from .models import Comment, Group, Post, Follow
 from .forms import PostForm, CommentForm
+from . import cards, counters, exporter, thumbnails
+from .caching import cache_versioned, generation_token, page_timeout
+from .feed import FeedPaginator
+from .paginators import CursorPaginator
+from .search import SearchPaginator
 
 MAX_POSTS = 10
+COMMENTS_PER_PAGE = 20
+COMMENT_ORDERINGS = {
+    'old': ('created', 'id'),
+    'new': ('-created', '-id'),
+}
 
 
-@cache_page(20)
+def feed_posts():
+    return Post.objects.select_related('author', 'group')
+
+
+def comment_order(request):
+    order = request.GET.get('order')
+    return order if order in COMMENT_ORDERINGS else 'old'
+
+
+def post_comment_list(post_id, order):
+    return Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).order_by(*COMMENT_ORDERINGS[order])
+
+
+def post_detail_scopes(post_id):
+    username = Post.objects.filter(
+        pk=post_id
+    ).values_list('author__username', flat=True).first()
+    return [f'post:{post_id}', f'author:{username}']
+
+
+@cache_versioned(lambda: ['all'])
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.all()
-    page_obj = paginator(request, posts)
+    posts = feed_posts()
+    page_obj = paginator(
+        request, posts, count=counters.get(counters.ALL_POSTS, 0)
+    )
+    cards.attach(page_obj, 'includes/text.html')
     title = 'Последние обновления на сайте'
     context = {
         'posts': posts,
         'page_obj': page_obj,
         'title': title,
+        'generation': generation_token(['all']),
+        # Страница с личными частями (без JS) в кэш фрагментов не идёт.
+        'cache_timeout': (
+            page_timeout() if getattr(request, 'shared_page', False) else 0
+        ),
     }
     return render(request, template, context)
 
 
+@cache_versioned(lambda slug: [f'group:{slug}'])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginator(request, posts)
+    posts = feed_posts().filter(group=group)
+    page_obj = paginator(
+        request, posts, count=counters.get(counters.GROUP_POSTS, group.pk)
+    )
+    cards.attach(page_obj, 'includes/text.html')
     context = {
         'group': group,
         'posts': posts,
@@ -37,46 +84,68 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@cache_versioned(lambda username: [f'author:{username}'])
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    post_count = posts.count()
-    user = request.user
-    following = user.is_authenticated and author.following.exists()
-    if user.is_authenticated:
-        if Follow.objects.filter(
-            user=request.user,
-            author=author,
-        ).exists():
-            following = True
-    page_obj = paginator(request, posts)
+    posts = feed_posts().filter(author=author)
+    post_count = counters.get(counters.AUTHOR_POSTS, author.pk)
+    page_obj = paginator(request, posts, count=post_count)
+    cards.attach(page_obj, 'includes/profile_card.html')
     context = {
         'post_count': post_count,
         'posts': posts,
         'page_obj': page_obj,
         'author': author,
-        'following': following,
     }
+    if not getattr(request, 'shared_page', False):
+        context['following'] = is_following(request.user, author)
     return render(request, 'posts/profile.html', context)
 
 
+@cache_versioned(post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    post_count = Post.objects.filter(author=post.author).count()
+    post = get_object_or_404(feed_posts(), pk=post_id)
+    post_count = counters.get(counters.AUTHOR_POSTS, post.author_id)
     group = post.group
     form = CommentForm(request.POST)
-    comments = post.comments.all()
     context = {
         'post': post,
         'post_count': post_count,
         'group': group,
         'form': form,
-        'comments': comments,
+        **comments_page(request, post.pk),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@cache_versioned(lambda post_id: [f'post:{post_id}'])
+def post_comments(request, post_id):
+    """Следующая порция комментариев для кнопки «Показать ещё»."""
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return render(
+        request, 'includes/comment_list.html',
+        comments_page(request, post_id),
+    )
+
+
+def comments_page(request, post_id):
+    order = comment_order(request)
+    comments = CursorPaginator(
+        post_comment_list(post_id, order),
+        COMMENTS_PER_PAGE,
+        ordering=COMMENT_ORDERINGS[order],
+    )
+    return {
+        'comments': comments.get_cursor_page(
+            after=request.GET.get('after')
+        ),
+        'order': order,
+        'post_id': post_id,
+    }
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == "POST":
@@ -84,34 +153,113 @@ def post_create(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            thumbnails.enqueue(post)
             return redirect('posts:profile', request.user)
 
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post)
-    if post.author != request.user:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id)
     if request.method == "POST":
         if form.is_valid():
             post = form.save()
-            form.save()
+            if 'image' in form.changed_data:
+                thumbnails.enqueue(post)
             return redirect('posts:post_detail', post_id)
     return render(request, 'posts/create_post.html', {'form': form})
 
 
-def paginator(request, posts):
-    paginator = Paginator(posts, MAX_POSTS)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+def is_following(user, author):
+    return user.is_authenticated and Follow.objects.filter(
+        user=user, author=author,
+    ).exists()
+
+
+@never_cache
+def personal(request):
+    """Личные части общих страниц: шапка, подписка, правка, форма.
+
+    Страницы с ``request.shared_page`` одинаковы для всех и кэшируются
+    целиком, а эти фрагменты браузер запрашивает отдельно. Без JS
+    страница открывается по ``request.personal_url`` целиком.
+    """
+    parts = {}
+    # Имя представления страницы: по нему отмечаются пункт меню и
+    # вкладка, как при отрисовке страницы целиком.
+    page = {'view_name': request.GET.get('view', '')}
+    if 'nav' in request.GET:
+        parts['nav'] = render_to_string(
+            'includes/personal/nav.html', page, request=request
+        )
+    if 'switcher' in request.GET:
+        parts['switcher'] = render_to_string(
+            'includes/personal/switcher.html', page, request=request
+        )
+    author = User.objects.filter(
+        username=request.GET.get('follow')
+    ).first() if 'follow' in request.GET else None
+    if author is not None:
+        parts['follow'] = render_to_string(
+            'includes/personal/follow.html',
+            {
+                'author': author,
+                'following': is_following(request.user, author),
+            },
+            request=request,
+        )
+    post_id = request.GET.get('edit') or request.GET.get('comment_form') or ''
+    post = Post.objects.filter(
+        pk=post_id
+    ).only('pk', 'author_id').first() if post_id.isdigit() else None
+    if post is not None and 'edit' in request.GET:
+        parts['edit'] = render_to_string(
+            'includes/personal/edit.html', {'post': post}, request=request
+        )
+    if post is not None and 'comment_form' in request.GET:
+        parts['comment_form'] = render_to_string(
+            'includes/personal/comment_form.html',
+            {'post': post, 'form': CommentForm()},
+            request=request,
+        )
+    return JsonResponse(parts)
+
+
+def paginator(request, posts, count=None, keyset=None):
+    if 'page' in request.GET:
+        paginator = Paginator(posts, MAX_POSTS)
+        if count is not None:
+            paginator.count = count
+        return paginator.get_page(request.GET.get('page'))
+    paginator = keyset or CursorPaginator(posts, MAX_POSTS)
+    return paginator.get_cursor_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = SearchPaginator(query, MAX_POSTS).get_cursor_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -123,11 +271,37 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+@never_cache
+def export(request):
+    """Посты, комментарии и подписки пользователя одним файлом JSONL.
+
+    Строки отдаются по мере чтения пачек из базы, поэтому объём данных
+    не ограничен памятью процесса.
+    """
+    username = request.user.username
+    response = StreamingHttpResponse(
+        exporter.stream(author=username),
+        content_type='application/x-ndjson; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube-{username}.jsonl"'
+    )
+    return response
+
+
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    post_count = posts.count()
-    page_obj = paginator(request, posts)
+    posts = feed_posts().filter(author__following__user=request.user)
+    post_count = counters.total(
+        counters.AUTHOR_POSTS,
+        Follow.objects.filter(user=request.user).values('author'),
+    )
+    page_obj = paginator(
+        request, posts, count=post_count,
+        keyset=FeedPaginator(request.user, MAX_POSTS),
+    )
+    cards.attach(page_obj, 'includes/text.html')
     context = {
         'page_obj': page_obj,
         'post_count': post_count,
@@ -136,6 +310,7 @@ def follow_index(request):
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -147,6 +322,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(
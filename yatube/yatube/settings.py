@@ -27,6 +27,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.querylog.SlowQueryMiddleware',
+    'core.templateprofile.TemplateProfileMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -34,6 +37,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -113,3 +117,64 @@ CACHES = {
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Авторы с большим числом подписчиков не раскладываются по лентам
+# при публикации, их посты подмешиваются в ленту при чтении.
+FEED_FANOUT_LIMIT = 1000
+
+# Страницы лент живут в кэше, пока сигналы моделей не увеличат
+# поколение соответствующей области (см. posts.caching).
+POSTS_CACHE_TIMEOUT = 60 * 60 * 6
+# Поколения в LocMemCache свои у каждого процесса, и изменение в одном
+# не видно другим: с локальным кэшем страницы живут недолго. Для
+# долгого срока нужен общий кэш (Redis, memcached).
+POSTS_LOCAL_CACHE_TIMEOUT = 20
+
+# Миниатюры новых изображений создаются в фоне, а не при первом показе;
+# 0 — сразу после фиксации, в потоке запроса.
+THUMBNAIL_WORKERS = 2
+
+# Загрузки пишутся во временный файл, а не держатся в памяти.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Изображения постов при загрузке уменьшаются до POST_IMAGE_MAX_SIDE
+# по большей стороне, теряют EXIF и пережимаются (JPEG или WEBP).
+POST_IMAGE_MAX_SIDE = 1920
+POST_IMAGE_FORMAT = 'JPEG'
+POST_IMAGE_QUALITY = 85
+
+# Список постов в админке с фильтрами считает строки только до этого
+# предела, чтобы не делать COUNT(*) по всей таблице.
+ADMIN_COUNT_LIMIT = 10000
+
+# Метрики представлений (core.metrics) копятся в общем для рабочих
+# процессов этой установки файле (None выключает метрики). /metrics
+# отдаёт их с токеном METRICS_TOKEN в заголовке Authorization: Bearer,
+# а без токена — только прямым запросам с METRICS_ALLOWED_IPS.
+METRICS_FILE = os.path.join(BASE_DIR, 'run', 'metrics')
+METRICS_SLOTS = 256
+METRICS_TOKEN = ''
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# SQL-запросы дольше стольких миллисекунд пишутся в журнал вместе с
+# планом (core.querylog); None выключает журнал. Значения параметров
+# запросов содержат данные пользователей и пишутся только по явному
+# включению.
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'logs', 'slow-queries.jsonl')
+SLOW_QUERY_LOG_PARAMS = False
+
+# Замер отрисовки шаблонов, include, block, тегов и фильтров
+# (core.templateprofile): заголовок Server-Timing и сводка в /metrics.
+TEMPLATE_PROFILING = False
+
+# Выборочный профиль запросов (core.profiling): доля профилируемых
+# запросов, шаг снятия стека в секундах, каталог и число хранимых
+# профилей, срок жизни подписанного заголовка X-Profile в секундах.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_KEEP = 200
+PROFILING_TOKEN_AGE = 3600
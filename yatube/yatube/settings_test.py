@@ -0,0 +1,9 @@
+"""Настройки для тестов: ``manage.py test`` и pytest."""
+from .settings import *  # noqa: F401,F403
+
+# Фоновая запись миниатюр гонялась бы с удалением временного
+# MEDIA_ROOT тестов: миниатюры создаются сразу после фиксации.
+THUMBNAIL_WORKERS = 0
+# Журнал медленных запросов и метрики тесты включают сами.
+SLOW_QUERY_MS = None
+METRICS_FILE = None